@@ -1,8 +1,11 @@
-import os
-import json
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTabWidget, QWidget, QLineEdit, QListWidget, 
-                             QDialogButtonBox, QFormLayout, QTextEdit, QListWidgetItem)
+                             QDialogButtonBox, QFormLayout, QTextEdit, QListWidgetItem, QPushButton)
 from PyQt6.QtGui import QPixmap
+from utils.plugin_registry import get_registry
+from utils.plugin_watcher import get_plugin_watcher
+
+SEARCH_RESULT_LIMIT = 500
+FILTER_FACETS = ("type", "slot")
 
 class AddItemDialog(QDialog):
     def __init__(self, parent=None):
@@ -23,6 +26,18 @@ class AddItemDialog(QDialog):
         
         self.search_bar = QLineEdit(placeholderText="Search for an item...")
         browse_layout.addWidget(self.search_bar)
+
+        # Facet filter chips: within a facet any checked value matches, across facets all must
+        self.facet_chips = {}
+        for facet in FILTER_FACETS:
+            chips_layout = QHBoxLayout()
+            for value in sorted(get_registry().item_facet_values(facet)):
+                chip = QPushButton(value.replace("_", " ").title(), checkable=True)
+                chip.setStyleSheet("QPushButton { border-radius: 8px; padding: 2px 8px; }")
+                self.facet_chips[(facet, value)] = chip
+                chips_layout.addWidget(chip)
+            chips_layout.addStretch()
+            browse_layout.addLayout(chips_layout)
         
         content_layout = QHBoxLayout()
         self.item_list = QListWidget()
@@ -52,31 +67,79 @@ class AddItemDialog(QDialog):
         self._connect_signals()
 
     def _load_items(self):
-        plugin_dir = "plugins/core_5e/items"
-        for root, _, files in os.walk(plugin_dir):
-            for filename in files:
-                if filename.endswith(".json"):
-                    filepath = os.path.join(root, filename)
-                    with open(filepath, 'r') as f:
-                        data = json.load(f)
-                        item_id = data.get("id", filename)
-                        self.item_data[item_id] = data
-                        
-                        list_item = QListWidgetItem(data.get("name", item_id))
-                        list_item.setData(32, item_id)
-                        self.item_list.addItem(list_item)
+        self.item_data = get_registry().items()
+        self._populate_list(self.item_data)
         self.item_list.sortItems()
 
+    def _populate_list(self, item_ids):
+        self.item_list.setUpdatesEnabled(False)
+        self.item_list.clear()
+        for item_id in item_ids:
+            list_item = QListWidgetItem(self.item_data[item_id].get("name", item_id))
+            list_item.setData(32, item_id)
+            self.item_list.addItem(list_item)
+        self.item_list.setUpdatesEnabled(True)
+
     def _connect_signals(self):
         self.button_box.accepted.connect(self.accept)
         self.button_box.rejected.connect(self.reject)
         self.search_bar.textChanged.connect(self._filter_items)
+        for chip in self.facet_chips.values():
+            chip.toggled.connect(lambda _: self._filter_items(self.search_bar.text()))
         self.item_list.itemClicked.connect(self._update_preview_panel)
+        get_plugin_watcher().content_changed.connect(self._on_content_changed)
 
-    def _filter_items(self, text):
+    def _on_content_changed(self, category, item_id, change):
+        if category != "items":
+            return
+        if self.search_bar.text().strip() or self._active_facet_filters():
+            # Rankings and facet matches may have shifted, so the (bounded) result list is rebuilt
+            self._filter_items(self.search_bar.text())
+            return
+
+        list_item = None
         for i in range(self.item_list.count()):
-            item = self.item_list.item(i)
-            item.setHidden(text.lower() not in item.text().lower())
+            if self.item_list.item(i).data(32) == item_id:
+                list_item = self.item_list.item(i)
+                break
+        if change == "removed":
+            if list_item:
+                self.item_list.takeItem(self.item_list.row(list_item))
+            return
+        data = self.item_data[item_id]
+        if list_item is None:
+            list_item = QListWidgetItem()
+            list_item.setData(32, item_id)
+            self.item_list.addItem(list_item)
+        list_item.setText(data.get("name", item_id))
+        self.item_list.sortItems()
+        if list_item is self.item_list.currentItem():
+            self._update_preview_panel(list_item)
+
+    def _active_facet_filters(self):
+        filters = {}
+        for (facet, value), chip in self.facet_chips.items():
+            if chip.isChecked():
+                filters.setdefault(facet, []).append(value)
+        return filters
+
+    def _filter_items(self, text):
+        registry = get_registry()
+        filters = self._active_facet_filters()
+        if not text.strip():
+            if not filters:
+                self._load_items()
+                return
+            self._populate_list(registry.query_items(filters))
+            self.item_list.sortItems()
+            return
+        # Search results replace the list, best matches first
+        if filters:
+            allowed = registry.query_items(filters)
+            ranked = [item_id for item_id in registry.search_items(text) if item_id in allowed]
+            self._populate_list(ranked[:SEARCH_RESULT_LIMIT])
+        else:
+            self._populate_list(registry.search_items(text, limit=SEARCH_RESULT_LIMIT))
 
     def _update_preview_panel(self, item_widget):
         item_id = item_widget.data(32)
@@ -87,10 +150,10 @@ class AddItemDialog(QDialog):
 
         html = ""
         if "image" in data:
-            # Assuming image path is relative to the plugin root
-            image_path = os.path.join("plugins/core_5e", data["image"])
-            if os.path.exists(image_path):
-                html += f'<img src="{image_path}" width="100"><br>'
+            # Image paths are relative to the root of the plugin that provides the item
+            image_source = get_registry().asset_source("items", item_id, data["image"], field="image")
+            if image_source:
+                html += f'<img src="{image_source}" width="100"><br>'
 
         html += f"<h3>{data.get('name', 'N/A')}</h3>"
         html += f"<i>{data.get('type', '').title()}</i><hr>"
@@ -126,3 +189,11 @@ class AddItemDialog(QDialog):
         
         if self.selected_item:
             super().accept()
+
+    def done(self, result):
+        # The watcher outlives the dialog; a connection left behind would keep it alive and updating
+        try:
+            get_plugin_watcher().content_changed.disconnect(self._on_content_changed)
+        except TypeError:
+            pass  # already disconnected by an earlier done()
+        super().done(result)
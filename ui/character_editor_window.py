@@ -1,28 +1,57 @@
 import os
-import json
-import math
-import base64
-from PyQt6.QtCore import pyqtSignal, Qt
-from PyQt6.QtGui import QAction, QPixmap
+import logging
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import pyqtSignal, Qt, QTimer
+from PyQt6.QtGui import QAction, QColor, QKeySequence, QPixmap
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QPushButton, QLabel, QMenu, 
                              QScrollArea, QGridLayout, QGroupBox, QLineEdit, QSpinBox, QCheckBox, QFormLayout,
                              QComboBox, QSpacerItem, QSizePolicy, QFileDialog, QTextEdit, QMessageBox)
+from ui.character_library_dialog import CharacterLibraryDialog, make_thumbnail
 from ui.class_choices_dialog import ClassChoicesDialog
 from ui.dice_roller_dialog import DiceRollerDialog
-from ui.inventory_tab import InventoryTab
+from ui.inventory_tab import InventoryTab, format_item_tooltip
+from utils import character_stats
+from utils.autosave import UNTITLED_PATH, Autosaver
+from utils.character_file import CharacterFileError, load_character
+from utils.character_library import CharacterLibrary
+from utils.character_model import Character, Sprite, ROLEPLAY_FIELDS
+from utils.character_stats import build_character_graph, format_modifier
+from utils.edit_history import MISSING, SPRITE_PATH, EditHistory, apply_changes, sheet_changes
+from utils.edit_journal import CharacterRecovery
+from utils.plugin_registry import get_registry
+from utils.plugin_watcher import get_plugin_watcher
+from utils.rules_engine import RulesEngine
+from utils.sprite_cache import SHEET_SIZE, get_sprite_cache, import_sprite
+
+logger = logging.getLogger(__name__)
 
 class CharacterEditorWindow(QWidget):
     show_main_menu_requested = pyqtSignal()
+    # Emitted from the sprite import thread, so the slots run on the UI thread
+    sprite_imported = pyqtSignal(bytes)
+    sprite_import_failed = pyqtSignal(str)
 
     # region Initialization and Core Setup
     def __init__(self):
         super().__init__()
         
         self.is_dirty = False
+        # Counts edits, so a save that finishes later only clears is_dirty if nothing changed since
+        self._edit_generation = 0
+        self._pending_saves = deque()  # edit generation of each save still being written
+        self._batch_depth = 0
+        self.last_batch_stats = None
         self.current_character_path = None
         self.class_data = {}
-        self.character_data = {}
+        self.character = Character()
+        self.history = EditHistory()
+        self._history_pending = False
+        self.library = CharacterLibrary(thumbnailer=make_thumbnail)
+        self._sprite_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sprite-import")
         self._load_class_data()
+        self.rules = RulesEngine(self.class_data)
 
         self.save_proficiencies = {}
         self.skill_proficiencies = {}
@@ -32,6 +61,7 @@ class CharacterEditorWindow(QWidget):
         self.save_values = {}
         self.death_save_successes = []
         self.death_save_failures = []
+        self.stats = build_character_graph()
 
         main_layout = QVBoxLayout(self)
         
@@ -58,9 +88,21 @@ class CharacterEditorWindow(QWidget):
         bottom_bar_layout.addWidget(self.dice_roller_button)
         main_layout.addLayout(bottom_bar_layout)
 
+        # Created before any widget is connected, since filling the sheet below already schedules autosaves
+        self.autosaver = Autosaver(self._autosave_snapshot, self)
+        self.autosaver.saved.connect(self._on_saved)
+        self.autosaver.save_failed.connect(self._on_save_failed)
+
+        self.character.class_name = self.class_combo.currentText()
+        self._bind_stats()
         self._connect_signals()
         self._update_all_calculations()
         self.is_dirty = False
+        # Also stops the debounce started while the sheet was filled in
+        self.autosaver.set_path(None, *self._autosave_snapshot())
+        self._reset_history()
+        # Offered once the window is up, a character that was never saved may have been lost in a crash
+        QTimer.singleShot(0, self._offer_untitled_recovery)
     # endregion
 
     # region Menus and Dialogs
@@ -77,7 +119,17 @@ class CharacterEditorWindow(QWidget):
         self.file_menu.addActions([new_char_action, load_char_action, save_action, save_char_as_action])
         
         self.edit_menu = QMenu("&Edit", self)
-        self.edit_menu.addActions([QAction("&Undo", self), QAction("&Redo", self)])
+        self.undo_action = QAction("&Undo", self, shortcut=QKeySequence.StandardKey.Undo)
+        self.undo_action.triggered.connect(self._undo)
+        self.redo_action = QAction("&Redo", self, shortcut=QKeySequence.StandardKey.Redo)
+        self.redo_action.triggered.connect(self._redo)
+        self.edit_menu.addActions([self.undo_action, self.redo_action])
+        # Also added to the window itself so the shortcuts work while the menu is not shown
+        self.addActions([self.undo_action, self.redo_action])
+
+    def closeEvent(self, event):
+        self.autosaver.shutdown()
+        super().closeEvent(event)
 
     def _open_dice_roller(self):
         dialog = DiceRollerDialog(self)
@@ -99,8 +151,33 @@ class CharacterEditorWindow(QWidget):
         if ret == QMessageBox.StandardButton.Save:
             return self._save_character()
         elif ret == QMessageBox.StandardButton.Discard:
+            self.autosaver.discard()
             return True
         return False
+
+    def _offer_recovery(self, path, name):
+        """Asks whether to restore edits journaled for path before a crash; returns the Character or None."""
+        recovery = CharacterRecovery(path)
+        if not recovery.has_recovery():
+            return None
+        ret = QMessageBox.question(self, "Recover Character",
+                                   f"{name} has unsaved changes from a previous session. Restore them?")
+        if ret == QMessageBox.StandardButton.Yes:
+            try:
+                return recovery.recover()
+            except (OSError, CharacterFileError) as e:
+                QMessageBox.warning(self, "Recover Character", f"Could not restore the changes:\n{e}")
+        recovery.discard()
+        return None
+
+    def _offer_untitled_recovery(self):
+        character = self._offer_recovery(UNTITLED_PATH, "An unsaved character")
+        if character is not None:
+            self.character = character
+            self._populate_sheet_from_data()
+            self._reset_history()
+            self.autosaver.set_path(None)
+            self._set_dirty()
     # endregion
 
     # region UI Setup
@@ -115,7 +192,7 @@ class CharacterEditorWindow(QWidget):
         header_layout = QHBoxLayout(header_group)
         self.sprite_label = QLabel("Click to Upload\nCharacter Sprite")
         self.sprite_label.mousePressEvent = self._upload_sprite
-        self.sprite_label.setFixedSize(150, 150)
+        self.sprite_label.setFixedSize(SHEET_SIZE, SHEET_SIZE)
         self.sprite_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.sprite_label.setStyleSheet("border: 1px solid grey; cursor: pointer;")
         header_layout.addWidget(self.sprite_label)
@@ -253,7 +330,7 @@ class CharacterEditorWindow(QWidget):
             cb = QCheckBox()
             self.death_save_failures.append(cb)
             death_saves_layout.addWidget(cb)
-        hp_layout.addLayout(death_saves_layout, 3, 0, 1, 2)
+        hp_layout.addWidget(death_saves_group, 3, 0, 1, 2)
         
         hit_dice_group = QGroupBox("Hit Dice")
         hit_dice_layout = QFormLayout(hit_dice_group)
@@ -314,10 +391,46 @@ class CharacterEditorWindow(QWidget):
 
     # region Calculations and Signals
     def _set_dirty(self):
-        self.is_dirty = True
+        if not self._batch_depth:
+            self.is_dirty = True
+            self._edit_generation += 1
+            self.autosaver.schedule()
+            self._schedule_history_record()
+
+    def _autosave_snapshot(self):
+        return self._gather_character_data(), self.character.sprite
+
+    @contextmanager
+    def _batch_update(self, operation):
+        """Applies many widget changes as one transaction.
+
+        Intermediate dirty flags, stat recalculations and repaints are held back; the stats are
+        recomputed in one pass and the sheet repainted once when the block ends. The work done
+        is logged and kept in `last_batch_stats`.
+        """
+        recalculations, passes = self.stats.recalculations, self.stats.passes
+        self._batch_depth += 1
+        if self._batch_depth == 1:
+            self.setUpdatesEnabled(False)
+        try:
+            with self.stats.batch():
+                yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.setUpdatesEnabled(True)
+            self.last_batch_stats = {
+                "operation": operation,
+                "recalculations": self.stats.recalculations - recalculations,
+                "passes": self.stats.passes - passes,
+            }
+            logger.debug("%s: %d stat recalculations in %d pass(es)", operation,
+                         self.last_batch_stats["recalculations"], self.last_batch_stats["passes"])
 
     def _connect_signals(self):
         self.main_menu_button.clicked.connect(self._request_return_to_main_menu)
+        # The model has to know the new class before the class change is handled
+        self.class_combo.currentTextChanged.connect(self._on_class_name_changed)
         self.class_combo.currentTextChanged.connect(self._on_class_changed)
         
         for widget in self.findChildren(QLineEdit):
@@ -328,54 +441,132 @@ class CharacterEditorWindow(QWidget):
         for widget in self.findChildren(QCheckBox):
             widget.stateChanged.connect(self._set_dirty)
         for widget in self.findChildren(QTextEdit):
-            widget.textChanged.connect(self._set_dirty)
+            if not widget.isReadOnly():
+                widget.textChanged.connect(self._set_dirty)
         self.class_combo.currentTextChanged.connect(self._set_dirty)
+        get_plugin_watcher().content_changed.connect(self._on_plugin_content_changed)
+        self.sprite_imported.connect(self._on_sprite_imported)
+        self.sprite_import_failed.connect(self._on_sprite_import_failed)
         
-        self.level_spinbox.valueChanged.connect(self._update_all_calculations)
-        for spinbox in self.ability_scores.values():
-            spinbox.valueChanged.connect(self._update_all_calculations)
-        for checkbox in self.save_proficiencies.values():
-            checkbox.stateChanged.connect(self._update_all_calculations)
-        for checkbox in self.skill_proficiencies.values():
-            checkbox.stateChanged.connect(self._update_all_calculations)
-
-    def _update_all_calculations(self):
-        level = self.level_spinbox.value()
-        prof_bonus = math.ceil(level / 4) + 1
-        self.prof_bonus_label.setText(f"+{prof_bonus}")
-
+        # Stat inputs are written straight into the model, and only the affected stats recomputed
+        self.level_spinbox.valueChanged.connect(self._on_level_changed)
         for ability, spinbox in self.ability_scores.items():
-            score = spinbox.value()
-            modifier = math.floor((score - 10) / 2)
-            self.ability_modifiers[ability].setText(f"+{modifier}" if modifier >= 0 else str(modifier))
-
-        dex_mod_str = self.ability_modifiers['dexterity'].text()
-        self.initiative_edit.setText(dex_mod_str)
-
-        skills_map = {"acrobatics": "dexterity", "animal_handling": "wisdom", "arcana": "intelligence", "athletics": "strength", "deception": "charisma", "history": "intelligence", "insight": "wisdom", "intimidation": "charisma", "investigation": "intelligence", "medicine": "wisdom", "nature": "intelligence", "perception": "wisdom", "performance": "charisma", "persuasion": "charisma", "religion": "intelligence", "sleight_of_hand": "dexterity", "stealth": "dexterity", "survival": "wisdom"}
-        
+            spinbox.valueChanged.connect(lambda value, ability=ability: self._on_ability_score_changed(ability, value))
         for ability, checkbox in self.save_proficiencies.items():
-            mod = int(self.ability_modifiers[ability].text())
-            total = mod + prof_bonus if checkbox.isChecked() else mod
-            self.save_values[ability].setText(f"+{total}" if total >= 0 else str(total))
-
+            checkbox.toggled.connect(lambda checked, ability=ability: self._on_save_proficiency_changed(ability, checked))
         for skill, checkbox in self.skill_proficiencies.items():
-            base_ability = skills_map[skill.replace(" ", "_")]
-            mod = int(self.ability_modifiers[base_ability].text())
-            total = mod + prof_bonus if checkbox.isChecked() else mod
-            self.skill_values[skill].setText(f"+{total}" if total >= 0 else str(total))
-        
-        class_name = self.class_combo.currentText()
-        if class_name in self.class_data:
-            class_info = self.class_data[class_name]
-            hit_dice = class_info.get("hit_dice", "d6")
-            self.hit_dice_total_label.setText(f"{level}{hit_dice}")
+            checkbox.toggled.connect(lambda checked, skill=skill: self._on_skill_proficiency_changed(skill, checked))
+
+    def _on_class_name_changed(self, class_name):
+        self.character.class_name = class_name
+
+    def _on_level_changed(self, level):
+        self.character.level = level
+        self.stats.set("level", level)
+
+    def _on_ability_score_changed(self, ability, value):
+        self.character.ability_scores[ability] = value
+        self.stats.set(character_stats.score(ability), value)
+
+    def _on_save_proficiency_changed(self, ability, checked):
+        _set_membership(self.character.save_proficiencies, ability, checked)
+        self.stats.set(character_stats.save_proficient(ability), checked)
+
+    def _on_skill_proficiency_changed(self, skill, checked):
+        _set_membership(self.character.skill_proficiencies, skill, checked)
+        self.stats.set(character_stats.skill_proficient(skill), checked)
+
+    def _bind_stats(self):
+        """Connects every derived stat to the widget showing it; only changed stats are repainted."""
+        def show_modifier(widget):
+            return lambda value: widget.setText(format_modifier(value))
+
+        self.stats.watch("proficiency_bonus", show_modifier(self.prof_bonus_label))
+        self.stats.watch("initiative", show_modifier(self.initiative_edit))
+        self.stats.watch("hit_dice_total", self.hit_dice_total_label.setText)
+        for ability in character_stats.ABILITIES:
+            self.stats.watch(character_stats.modifier(ability), show_modifier(self.ability_modifiers[ability]))
+            self.stats.watch(character_stats.save(ability), show_modifier(self.save_values[ability]))
+        for skill in character_stats.SKILL_ABILITIES:
+            self.stats.watch(character_stats.skill(skill), show_modifier(self.skill_values[skill]))
+        self.stats.refresh()
+
+    def _update_all_calculations(self):
+        """Recomputes the stats of the whole model, e.g. after loading a character or changing class."""
+        class_info = self.rules.class_info(self.character)
+        if class_info is not None:
             prof_text = "Armor: " + ", ".join(class_info.get("proficiencies", {}).get("armor", []))
             prof_text += "\nWeapons: " + ", ".join(class_info.get("proficiencies", {}).get("weapons", []))
             self.proficiencies_list.setText(prof_text)
+        self.stats.update(self.rules.stat_inputs(self.character))
 
     # endregion
 
+    # region Undo and Redo
+    def _reset_history(self):
+        """Starts an empty history from what the sheet shows now, e.g. after a load."""
+        self.history.clear()
+        self._history_pending = False
+        self._history_sheet = self._gather_character_data()
+        self._history_sprite = self.character.sprite
+        self._update_undo_actions()
+
+    def _schedule_history_record(self):
+        if not self._history_pending:
+            self._history_pending = True
+            # Recorded once the other handlers of this change have updated the model
+            QTimer.singleShot(0, self._record_history)
+
+    def _record_history(self):
+        """Records how the sheet differs from the last recorded state as an undo step."""
+        if not self._history_pending:
+            return
+        self._history_pending = False
+        sheet = self._gather_character_data()
+        changes = sheet_changes(self._history_sheet, sheet)
+        if self.character.sprite is not self._history_sprite:
+            changes.append((SPRITE_PATH, self._history_sprite, self.character.sprite))
+        self.history.record(changes)
+        self._history_sheet = sheet
+        self._history_sprite = self.character.sprite
+        self._update_undo_actions()
+
+    def _undo(self):
+        self._record_history()
+        if self.history.can_undo():
+            self._restore_changes(self.history.undo(), "undo")
+
+    def _redo(self):
+        self._record_history()
+        if self.history.can_redo():
+            self._restore_changes(self.history.redo(), "redo")
+
+    def _restore_changes(self, changes, operation):
+        """Applies [(path, value)] from the history to the sheet without recording them again."""
+        sprite = self._history_sprite
+        field_values = []
+        for path, value in changes:
+            if path == SPRITE_PATH:
+                sprite = None if value is MISSING else value
+            else:
+                field_values.append((path, value))
+        character = Character.from_dict(apply_changes(self._history_sheet, field_values))
+        character.sprite = sprite
+        self.character = character
+        with self._batch_update(operation):
+            self._fill_sheet_from_model()
+        self._history_sheet = self._gather_character_data()
+        self._history_sprite = sprite
+        self.is_dirty = True
+        self._edit_generation += 1
+        self.autosaver.schedule()
+        self._update_undo_actions()
+
+    def _update_undo_actions(self):
+        self.undo_action.setEnabled(self.history.can_undo())
+        self.redo_action.setEnabled(self.history.can_redo())
+    # endregion
+
     # region Data Handling (Save/Load/Class Change)
     def _request_return_to_main_menu(self):
         if self._check_for_unsaved_changes():
@@ -384,154 +575,176 @@ class CharacterEditorWindow(QWidget):
     def _new_character(self):
         if self._check_for_unsaved_changes():
             self.current_character_path = None
-            self.character_data = {}
+            self.character = Character()
             self._populate_sheet_from_data()
+            self._reset_history()
+            self.autosaver.set_path(None, *self._autosave_snapshot())
 
     def _gather_character_data(self):
-        self.character_data['name'] = self.name_edit.text()
-        self.character_data['level'] = self.level_spinbox.value()
-        self.character_data['class'] = self.class_combo.currentText()
-        self.character_data['race'] = self.race_edit.text()
-        self.character_data['background'] = self.background_edit.text()
-        self.character_data['alignment'] = self.alignment_edit.text()
-        self.character_data['player_name'] = self.player_name_edit.text()
-        self.character_data['experience'] = self.exp_spinbox.value()
-        self.character_data['inspiration'] = self.inspiration_spinbox.value()
-        self.character_data['hp_max'] = self.max_hp_spinbox.value()
-        self.character_data['hp_current'] = self.current_hp_spinbox.value()
-        self.character_data['hp_temp'] = self.temp_hp_spinbox.value()
-        self.character_data['ac'] = self.ac_edit.text()
-        self.character_data['speed'] = self.speed_edit.text()
-        self.character_data['hit_dice_current'] = self.hit_dice_current_spinbox.value()
-        self.character_data['death_saves'] = {
-            'successes': [cb.isChecked() for cb in self.death_save_successes],
-            'failures': [cb.isChecked() for cb in self.death_save_failures]
+        """Copies the fields that are only edited in widgets into the model and returns its file dict.
+
+        The sprite is left out of the dict; it is kept as a Sprite on the model.
+        """
+        character = self.character
+        character.name = self.name_edit.text()
+        character.race = self.race_edit.text()
+        character.background = self.background_edit.text()
+        character.alignment = self.alignment_edit.text()
+        character.player_name = self.player_name_edit.text()
+        character.experience = self.exp_spinbox.value()
+        character.inspiration = self.inspiration_spinbox.value()
+        character.hp_max = self.max_hp_spinbox.value()
+        character.hp_current = self.current_hp_spinbox.value()
+        character.hp_temp = self.temp_hp_spinbox.value()
+        character.ac = self.ac_edit.text()
+        character.speed = self.speed_edit.text()
+        character.hit_dice_current = self.hit_dice_current_spinbox.value()
+        character.death_save_successes = [cb.isChecked() for cb in self.death_save_successes]
+        character.death_save_failures = [cb.isChecked() for cb in self.death_save_failures]
+
+        roleplay_edits = {
+            'personality': self.personality_edit,
+            'ideals': self.ideals_edit,
+            'bonds': self.bonds_edit,
+            'flaws': self.flaws_edit,
+            'allies': self.allies_edit,
+            'backstory': self.backstory_edit
         }
+        character.roleplay = {field: roleplay_edits[field].toPlainText() for field in ROLEPLAY_FIELDS}
         
-        self.character_data['ability_scores'] = {k: v.value() for k, v in self.ability_scores.items()}
-        self.character_data['proficiencies'] = {
-            'saves': [k for k, v in self.save_proficiencies.items() if v.isChecked()],
-            'skills': [k for k, v in self.skill_proficiencies.items() if v.isChecked()]
-        }
-        
-        self.character_data['roleplay'] = {
-            'personality': self.personality_edit.toPlainText(),
-            'ideals': self.ideals_edit.toPlainText(),
-            'bonds': self.bonds_edit.toPlainText(),
-            'flaws': self.flaws_edit.toPlainText(),
-            'allies': self.allies_edit.toPlainText(),
-            'backstory': self.backstory_edit.toPlainText()
-        }
+        character.equipment = {name: slot.item_data for name, slot in self.inventory_widget.hexagon_widget.slots.items() if slot.item_data}
         
-        self.character_data['equipment'] = {name: slot.item_data for name, slot in self.inventory_widget.hexagon_widget.slots.items() if slot.item_data}
-        
-        inventory = {
+        character.inventory = {
             'gear': [self.inventory_widget.gear_list.item(i).data(Qt.ItemDataRole.UserRole) for i in range(self.inventory_widget.gear_list.count())],
             'consumables': [self.inventory_widget.consumables_list.item(i).data(Qt.ItemDataRole.UserRole) for i in range(self.inventory_widget.consumables_list.count())],
             'items': [self.inventory_widget.items_list.item(i).data(Qt.ItemDataRole.UserRole) for i in range(self.inventory_widget.items_list.count())]
         }
-        self.character_data['inventory'] = inventory
         
-        return self.character_data
+        return character.to_dict(include_sprite=False)
 
     def _populate_sheet_from_data(self):
-        data = self.character_data
+        with self._batch_update("load sheet"):
+            self._fill_sheet_from_model()
+        self.is_dirty = False
+
+    def _fill_sheet_from_model(self):
+        character = self.character
+        # Unchecking the boxes below writes through to the model, so keep what the file says first
+        saves = set(character.save_proficiencies)
+        skills = set(character.skill_proficiencies)
         
         self.class_combo.blockSignals(True)
-        self.name_edit.setText(data.get('name', ''))
-        self.level_spinbox.setValue(data.get('level', 1))
-        self.class_combo.setCurrentText(data.get('class', ''))
-        self.race_edit.setText(data.get('race', ''))
-        self.background_edit.setText(data.get('background', ''))
-        self.alignment_edit.setText(data.get('alignment', ''))
-        self.player_name_edit.setText(data.get('player_name', ''))
-        self.exp_spinbox.setValue(data.get('experience', 0))
-        self.inspiration_spinbox.setValue(data.get('inspiration', 0))
-        self.max_hp_spinbox.setValue(data.get('hp_max', 0))
-        self.current_hp_spinbox.setValue(data.get('hp_current', 0))
-        self.temp_hp_spinbox.setValue(data.get('hp_temp', 0))
-        self.ac_edit.setText(data.get('ac', ''))
-        self.speed_edit.setText(data.get('speed', ''))
-        self.hit_dice_current_spinbox.setValue(data.get('hit_dice_current', 0))
+        self.name_edit.setText(character.name)
+        self.level_spinbox.setValue(character.level)
+        self._fill_class_combo(character.class_name)
+        self.race_edit.setText(character.race)
+        self.background_edit.setText(character.background)
+        self.alignment_edit.setText(character.alignment)
+        self.player_name_edit.setText(character.player_name)
+        self.exp_spinbox.setValue(character.experience)
+        self.inspiration_spinbox.setValue(character.inspiration)
+        self.max_hp_spinbox.setValue(character.hp_max)
+        self.current_hp_spinbox.setValue(character.hp_current)
+        self.temp_hp_spinbox.setValue(character.hp_temp)
+        self.ac_edit.setText(character.ac)
+        self.speed_edit.setText(character.speed)
+        self.hit_dice_current_spinbox.setValue(character.hit_dice_current)
         self.class_combo.blockSignals(False)
+        # A sheet without a class takes the one the dropdown starts on
+        character.class_name = self.class_combo.currentText()
 
-        if 'sprite' in data and data['sprite']:
-            pixmap = QPixmap()
-            pixmap.loadFromData(base64.b64decode(data['sprite']))
-            self.sprite_label.setPixmap(pixmap.scaled(150, 150, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-        else:
-            self.sprite_label.setText("Click to Upload\nCharacter Sprite")
-            self.sprite_label.setPixmap(QPixmap())
+        self._show_sprite()
 
-        for ability, score in data.get('ability_scores', {}).items():
+        for ability, score in list(character.ability_scores.items()):
             if ability in self.ability_scores:
                 self.ability_scores[ability].setValue(score)
 
         self._reset_proficiencies()
-        proficiencies = data.get('proficiencies', {})
-        for save in proficiencies.get('saves', []):
+        for save in saves:
             if save in self.save_proficiencies:
                 self.save_proficiencies[save].setChecked(True)
-        for skill in proficiencies.get('skills', []):
+        for skill in skills:
             if skill in self.skill_proficiencies:
                 self.skill_proficiencies[skill].setChecked(True)
         
-        roleplay_data = data.get('roleplay', {})
-        self.personality_edit.setPlainText(roleplay_data.get('personality', ''))
-        self.ideals_edit.setPlainText(roleplay_data.get('ideals', ''))
-        self.bonds_edit.setPlainText(roleplay_data.get('bonds', ''))
-        self.flaws_edit.setPlainText(roleplay_data.get('flaws', ''))
-        self.allies_edit.setPlainText(roleplay_data.get('allies', ''))
-        self.backstory_edit.setPlainText(roleplay_data.get('backstory', ''))
+        self.personality_edit.setPlainText(character.roleplay.get('personality', ''))
+        self.ideals_edit.setPlainText(character.roleplay.get('ideals', ''))
+        self.bonds_edit.setPlainText(character.roleplay.get('bonds', ''))
+        self.flaws_edit.setPlainText(character.roleplay.get('flaws', ''))
+        self.allies_edit.setPlainText(character.roleplay.get('allies', ''))
+        self.backstory_edit.setPlainText(character.roleplay.get('backstory', ''))
         
-        death_saves = data.get('death_saves', {})
-        for i, checked in enumerate(death_saves.get('successes', [])):
+        for i, checked in enumerate(character.death_save_successes):
             self.death_save_successes[i].setChecked(checked)
-        for i, checked in enumerate(death_saves.get('failures', [])):
+        for i, checked in enumerate(character.death_save_failures):
             self.death_save_failures[i].setChecked(checked)
             
-        equipment = data.get('equipment', {})
-        for name, item_data in equipment.items():
+        for name, item_data in character.equipment.items():
             if name in self.inventory_widget.hexagon_widget.slots:
                 slot = self.inventory_widget.hexagon_widget.slots[name]
                 slot.item_data = item_data
                 slot.setText(item_data['name'])
                 slot.setToolTip(format_item_tooltip(item_data))
         
-        inventory = data.get('inventory', {})
         self.inventory_widget.gear_list.clear()
-        for item_data in inventory.get('gear', []):
+        for item_data in character.inventory.get('gear', []):
             self.inventory_widget._add_item_to_list(item_data)
         self.inventory_widget.consumables_list.clear()
-        for item_data in inventory.get('consumables', []):
+        for item_data in character.inventory.get('consumables', []):
             self.inventory_widget._add_item_to_list(item_data)
         self.inventory_widget.items_list.clear()
-        for item_data in inventory.get('items', []):
+        for item_data in character.inventory.get('items', []):
             self.inventory_widget._add_item_to_list(item_data)
 
         self._apply_class_proficiencies(self.class_combo.currentText())
         self._update_all_calculations()
-        self.is_dirty = False
 
     def _on_class_changed(self, class_name):
         if not class_name or class_name not in self.class_data:
             return
 
-        self._reset_proficiencies()
-        self._apply_class_proficiencies(class_name)
-        
         dialog = ClassChoicesDialog(self)
         dialog.populate_choices(self.class_data[class_name])
-        
-        if dialog.exec():
-            results = dialog.results
-            for skill_name in results.get('skills', []):
-                key = skill_name.lower().replace(" ", "_")
-                if key in self.skill_proficiencies:
-                    self.skill_proficiencies[key].setChecked(True)
-                    self.skill_proficiencies[key].setEnabled(False)
+        accepted = dialog.exec()
+
+        with self._batch_update("change class"):
+            self._reset_proficiencies()
+            self._apply_class_proficiencies(class_name)
+            if accepted:
+                results = dialog.results
+                for skill_name in results.get('skills', []):
+                    key = skill_name.lower().replace(" ", "_")
+                    if key in self.skill_proficiencies:
+                        self.skill_proficiencies[key].setChecked(True)
+                        self.skill_proficiencies[key].setEnabled(False)
+            self._update_all_calculations()
+        self._set_dirty()
+
+    def _on_plugin_content_changed(self, category, entry_id, change):
+        if category != "classes":
+            return
+        # class_data is the registry's own index, which has already been patched
+        self.class_combo.blockSignals(True)
+        self._fill_class_combo(self.character.class_name)
+        self.class_combo.blockSignals(False)
         self._update_all_calculations()
 
+    def _fill_class_combo(self, class_name):
+        """Lists the installed classes and selects class_name.
+
+        A class that no installed plugin provides (any more) is kept, greyed out and marked as
+        missing, so loading a sheet or reloading plugins never switches the character's class.
+        """
+        self.class_combo.clear()
+        self.class_combo.addItems(sorted(self.class_data.keys()))
+        if class_name and class_name not in self.class_data:
+            self.class_combo.addItem(class_name)
+            index = self.class_combo.count() - 1
+            self.class_combo.setItemData(index, QColor('grey'), Qt.ItemDataRole.ForegroundRole)
+            self.class_combo.setItemData(index, "Missing: no installed plugin provides this class",
+                                         Qt.ItemDataRole.ToolTipRole)
+        self.class_combo.setCurrentText(class_name)
+
     def _apply_class_proficiencies(self, class_name):
         if not class_name or class_name not in self.class_data:
             return
@@ -544,18 +757,45 @@ class CharacterEditorWindow(QWidget):
     def _upload_sprite(self, event):
         file_name, _ = QFileDialog.getOpenFileName(self, "Upload Sprite", "", "Image Files (*.png *.jpg *.bmp)")
         if file_name:
-            pixmap = QPixmap(file_name)
-            self.sprite_label.setPixmap(pixmap.scaled(150, 150, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-            with open(file_name, "rb") as image_file:
-                self.character_data['sprite'] = base64.b64encode(image_file.read()).decode('utf-8')
-            self._set_dirty()
+            self.sprite_label.setText("Loading...")
+            self._sprite_executor.submit(self._import_sprite, file_name)
+
+    def _import_sprite(self, file_name):
+        """Runs on the sprite import thread: decodes, downscales and thumbnails a picked image."""
+        try:
+            data = import_sprite(file_name)
+            # Warms the cache, so showing the new sprite does not decode it on the UI thread
+            get_sprite_cache().thumbnail(data, SHEET_SIZE)
+        except (OSError, ValueError) as e:
+            self.sprite_import_failed.emit(str(e))
+            return
+        self.sprite_imported.emit(data)
+
+    def _on_sprite_imported(self, data):
+        self.character.sprite = Sprite(data)
+        self._show_sprite()
+        self._set_dirty()
+
+    def _on_sprite_import_failed(self, error):
+        self._show_sprite()
+        QMessageBox.warning(self, "Upload Sprite", f"Could not load the image:\n{error}")
+
+    def _show_sprite(self):
+        """Shows the character's sprite at sheet size from the sprite cache, or the upload hint."""
+        sprite = self.character.sprite
+        thumbnail = get_sprite_cache().thumbnail(sprite.data, SHEET_SIZE) if sprite is not None and sprite.data else None
+        pixmap = QPixmap()
+        if thumbnail and pixmap.loadFromData(thumbnail):
+            self.sprite_label.setPixmap(pixmap)
+        else:
+            self.sprite_label.setPixmap(QPixmap())
+            self.sprite_label.setText("Click to Upload\nCharacter Sprite")
 
     def _save_character(self):
         if self.current_character_path:
-            data_to_save = self._gather_character_data()
-            with open(self.current_character_path, 'w') as f:
-                json.dump(data_to_save, f, indent=4)
-            self.is_dirty = False
+            # Written in the background; _on_saved() or _on_save_failed() follows
+            self._pending_saves.append(self._edit_generation)
+            self.autosaver.save(self.current_character_path)
             return True
         else:
             return self._save_character_as()
@@ -565,28 +805,48 @@ class CharacterEditorWindow(QWidget):
         if file_name:
             if not file_name.endswith('.dndc'):
                 file_name += '.dndc'
+            self.library.add_folder(os.path.dirname(file_name))
             self.current_character_path = file_name
             return self._save_character()
         return False
 
     def _load_character(self):
         if self._check_for_unsaved_changes():
-            file_name, _ = QFileDialog.getOpenFileName(self, "Load Character", "", "DnD Character (*.dndc);;All Files (*)")
+            dialog = CharacterLibraryDialog(self.library, self)
+            file_name = dialog.selected_path if dialog.exec() else None
             if file_name:
+                try:
+                    character = load_character(file_name)
+                except (OSError, CharacterFileError) as e:
+                    QMessageBox.warning(self, "Load Character", f"Could not load {file_name}:\n{e}")
+                    return
                 self.current_character_path = file_name
-                with open(file_name, 'r') as f:
-                    self.character_data = json.load(f)
+                self.character = character
                 self._populate_sheet_from_data()
+                recovered = self._offer_recovery(file_name, os.path.basename(file_name))
+                if recovered is None:
+                    self._reset_history()
+                    self.autosaver.set_path(file_name, *self._autosave_snapshot())
+                else:
+                    # The next autosave folds the restored state into a fresh snapshot
+                    self.character = recovered
+                    self._populate_sheet_from_data()
+                    self._reset_history()
+                    self.autosaver.set_path(file_name)
+                    self._set_dirty()
+
+    def _on_saved(self, path):
+        if self._pending_saves.popleft() == self._edit_generation:
+            self.is_dirty = False
+        self.library.refresh(path)
+
+    def _on_save_failed(self, path, error):
+        # is_dirty stays set and the journal is kept, so the edits are neither lost nor forgotten
+        self._pending_saves.popleft()
+        QMessageBox.warning(self, "Save Character", f"Could not save {path}:\n{error}")
 
     def _load_class_data(self):
-        plugin_dir = "plugins/core_5e/classes"
-        if not os.path.exists(plugin_dir): return
-        for filename in os.listdir(plugin_dir):
-            if filename.endswith(".json"):
-                filepath = os.path.join(plugin_dir, filename)
-                with open(filepath, 'r') as f:
-                    data = json.load(f)
-                    self.class_data[data["name"]] = data
+        self.class_data = get_registry().classes_by_name()
 
     def _reset_proficiencies(self):
         for checkbox in self.save_proficiencies.values():
@@ -596,3 +856,10 @@ class CharacterEditorWindow(QWidget):
             checkbox.setChecked(False)
             checkbox.setEnabled(True)
     # endregion
+
+
+def _set_membership(members, key, present):
+    if present:
+        members.add(key)
+    else:
+        members.discard(key)
@@ -0,0 +1,189 @@
+import os
+from datetime import datetime
+from PyQt6.QtCore import Qt, QByteArray, QSize
+from PyQt6.QtGui import QIcon, QPixmap
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QComboBox, QTableWidget,
+                             QTableWidgetItem, QAbstractItemView, QHeaderView, QPushButton, QDialogButtonBox,
+                             QFileDialog, QLabel)
+from utils.sprite_cache import LIBRARY_SIZE, get_sprite_cache
+
+RESULT_LIMIT = 2000
+# Table columns and the library column each one sorts by
+COLUMNS = (("", None), ("Name", "name"), ("Class", "class_name"), ("Level", "level"), ("Race", "race"),
+           ("Player", "player_name"), ("Modified", "mtime_ns"))
+
+
+def make_thumbnail(data):
+    """Returns the PNG thumbnail of sprite image bytes stored in the library index."""
+    return get_sprite_cache().thumbnail(data, LIBRARY_SIZE)
+
+
+class CharacterLibraryDialog(QDialog):
+    """Browses the characters in the library folders; selected_path is set when one is opened."""
+
+    def __init__(self, library, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Character Library")
+        self.setMinimumSize(700, 500)
+
+        self.library = library
+        self.selected_path = None
+        self.sort_column = "name"
+        self.sort_descending = False
+        self._entries = []
+        self._icons = {}  # (path, mtime_ns) -> QIcon, kept while the dialog is open
+
+        main_layout = QVBoxLayout(self)
+        filter_layout = QHBoxLayout()
+        self.search_bar = QLineEdit(placeholderText="Search by name, class, race or player...")
+        self.class_filter = QComboBox()
+        filter_layout.addWidget(self.search_bar, 1)
+        filter_layout.addWidget(self.class_filter)
+        main_layout.addLayout(filter_layout)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([title for title, _ in COLUMNS])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setIconSize(QSize(LIBRARY_SIZE, LIBRARY_SIZE))
+        self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setDefaultSectionSize(LIBRARY_SIZE + 4)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.table.horizontalHeader().setSortIndicatorShown(True)
+        main_layout.addWidget(self.table)
+
+        self.status_label = QLabel()
+        main_layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        self.add_folder_button = QPushButton("Add Folder...")
+        self.remove_folder_button = QPushButton("Remove Folder...")
+        self.browse_button = QPushButton("Open File...")
+        button_layout.addWidget(self.add_folder_button)
+        button_layout.addWidget(self.remove_folder_button)
+        button_layout.addWidget(self.browse_button)
+        button_layout.addStretch()
+        self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Open | QDialogButtonBox.StandardButton.Cancel)
+        button_layout.addWidget(self.button_box)
+        main_layout.addLayout(button_layout)
+
+        self._connect_signals()
+        self._rescan()
+
+    def _connect_signals(self):
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        self.search_bar.textChanged.connect(self._refresh_table)
+        self.class_filter.currentIndexChanged.connect(self._refresh_table)
+        self.table.horizontalHeader().sectionClicked.connect(self._on_header_clicked)
+        self.table.cellDoubleClicked.connect(lambda *_: self.accept())
+        self.table.verticalScrollBar().valueChanged.connect(self._load_visible_icons)
+        self.add_folder_button.clicked.connect(self._add_folder)
+        self.remove_folder_button.clicked.connect(self._remove_folder)
+        self.browse_button.clicked.connect(self._browse_file)
+
+    def _rescan(self):
+        errors = []
+        self.library.scan(errors)
+        # Rebuilt without emitting, the table is refreshed once below
+        self.class_filter.blockSignals(True)
+        current_class = self.class_filter.currentData()
+        self.class_filter.clear()
+        self.class_filter.addItem("All Classes", None)
+        for class_name in self.library.class_names():
+            self.class_filter.addItem(class_name, class_name)
+        index = self.class_filter.findData(current_class)
+        self.class_filter.setCurrentIndex(max(index, 0))
+        self.class_filter.blockSignals(False)
+        self._refresh_table()
+        if errors:
+            self.status_label.setToolTip("\n".join(f"{path}: {message}" for path, message in errors))
+            self.status_label.setText(self.status_label.text() + f" ({len(errors)} unreadable files skipped)")
+
+    def _refresh_table(self):
+        entries = self.library.query(self.search_bar.text(), self.class_filter.currentData(),
+                                     sort=self.sort_column, descending=self.sort_descending, limit=RESULT_LIMIT)
+        self.table.setUpdatesEnabled(False)
+        self.table.setRowCount(len(entries))
+        self._entries = entries
+        for row, entry in enumerate(entries):
+            thumbnail_item = QTableWidgetItem()
+            thumbnail_item.setData(Qt.ItemDataRole.UserRole, entry.path)
+            thumbnail_item.setToolTip(entry.path)
+            self.table.setItem(row, 0, thumbnail_item)
+            modified = datetime.fromtimestamp(entry.mtime_ns / 1e9).strftime("%Y-%m-%d %H:%M")
+            for column, text in enumerate((entry.name, entry.class_name, str(entry.level), entry.race,
+                                           entry.player_name, modified), start=1):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+        self.table.setUpdatesEnabled(True)
+        self._load_visible_icons()
+
+        total = len(self.library)
+        shown = f"{len(entries)} of {total}" if len(entries) < total else f"{total}"
+        self.status_label.setText(f"{shown} characters in {len(self.library.folders())} folders")
+
+    def _load_visible_icons(self, *_):
+        """Sets the thumbnails of the rows in view; the rest are loaded when scrolled to."""
+        if not self._entries:
+            return
+        first = max(self.table.rowAt(0), 0)
+        last = self.table.rowAt(self.table.viewport().height() - 1)
+        if last < 0:
+            last = len(self._entries) - 1
+        for row in range(first, last + 1):
+            entry = self._entries[row]
+            item = self.table.item(row, 0)
+            if not entry.has_thumbnail or item is None or not item.icon().isNull():
+                continue
+            key = (entry.path, entry.mtime_ns)
+            icon = self._icons.get(key)
+            if icon is None:
+                pixmap = QPixmap()
+                pixmap.loadFromData(QByteArray(self.library.thumbnail(entry.path) or b""))
+                icon = self._icons[key] = QIcon(pixmap)
+            item.setIcon(icon)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._load_visible_icons()
+
+    def _on_header_clicked(self, column):
+        sort_column = COLUMNS[column][1]
+        if sort_column is None:
+            return
+        if sort_column == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column, self.sort_descending = sort_column, False
+        order = Qt.SortOrder.DescendingOrder if self.sort_descending else Qt.SortOrder.AscendingOrder
+        self.table.horizontalHeader().setSortIndicator(column, order)
+        self._refresh_table()
+
+    def _add_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Add Folder to Library")
+        if folder:
+            self.library.add_folder(folder)
+            self._rescan()
+
+    def _remove_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Remove Folder from Library",
+                                                  (self.library.folders() or [""])[0])
+        if folder:
+            self.library.remove_folder(folder)
+            self._rescan()
+
+    def _browse_file(self):
+        file_name, _ = QFileDialog.getOpenFileName(self, "Load Character", "", "DnD Character (*.dndc);;All Files (*)")
+        if file_name:
+            # Characters opened from elsewhere show up in the library from then on
+            self.library.add_folder(os.path.dirname(file_name))
+            self.selected_path = file_name
+            super().accept()
+
+    def accept(self):
+        row = self.table.currentRow()
+        if row < 0:
+            return
+        self.selected_path = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        super().accept()
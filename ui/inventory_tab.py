@@ -1,21 +1,38 @@
 import math
 import json
-import os
 from PyQt6.QtCore import Qt, QPointF, QMimeData
 from PyQt6.QtGui import QPainter, QPolygonF, QPen, QColor, QDrag, QFont, QPixmap
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QLabel, QGridLayout, 
                              QPushButton, QListWidget, QListWidgetItem, QApplication, QDialog, QTextBrowser)
 from ui.add_item_dialog import AddItemDialog
+from utils.plugin_registry import get_registry
+
+ITEM_ID_MIME_TYPE = "application/x-raven-item-id"
+
+def item_image_source(item_data):
+    """Returns an <img src> for an item's image, resolved against the plugin that provides it."""
+    if "image" not in item_data:
+        return None
+    return get_registry().asset_source("items", item_data.get("id"), item_data["image"], field="image")
+
+def item_pixmap(item_data):
+    """Loads an item's image, which may live in a plugin folder or a packed plugin archive."""
+    if "image" not in item_data:
+        return None
+    data = get_registry().read_asset("items", item_data.get("id"), item_data["image"], field="image")
+    pixmap = QPixmap()
+    if data is None or not pixmap.loadFromData(data):
+        return None
+    return pixmap
 
 def format_item_tooltip(item_data):
     if not item_data:
         return ""
     
     html = ""
-    if "image" in item_data:
-        image_path = os.path.join("plugins/core_5e", item_data["image"])
-        if os.path.exists(image_path):
-            html += f'<img src="{image_path}" width="64"><br>'
+    image_source = item_image_source(item_data)
+    if image_source:
+        html += f'<img src="{image_source}" width="64"><br>'
 
     html += f"<h3>{item_data.get('name', 'N/A')}</h3>"
     html += f"<i>{item_data.get('type', '').title()}</i><hr>"
@@ -51,8 +68,16 @@ class DroppableSlot(QLabel):
         self.setStyleSheet("border: 1px solid grey; background-color: rgba(255, 255, 255, 150);")
 
     def dragEnterEvent(self, event):
-        if event.mimeData().hasFormat("application/json"):
-            item_data = json.loads(event.mimeData().data("application/json").data().decode())
+        mime_data = event.mimeData()
+        if mime_data.hasFormat(ITEM_ID_MIME_TYPE):
+            # Registered items are checked against the registry's slot index
+            item_id = mime_data.data(ITEM_ID_MIME_TYPE).data().decode()
+            if get_registry().item_fits_slot(item_id, self.slot_type):
+                event.acceptProposedAction()
+            else:
+                event.ignore()
+        elif mime_data.hasFormat("application/json"):
+            item_data = json.loads(mime_data.data("application/json").data().decode())
             item_slot = item_data.get("slot")
             
             if isinstance(item_slot, list) and self.slot_type in item_slot:
@@ -71,15 +96,11 @@ class DroppableSlot(QLabel):
         self.item_data = item_data
         self.setToolTip(format_item_tooltip(item_data))
         
-        if "image" in item_data:
-            image_path = os.path.join("plugins/core_5e", item_data["image"])
-            if os.path.exists(image_path):
-                pixmap = QPixmap(image_path)
-                self.setPixmap(pixmap.scaled(self.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-            else:
-                self.setText(item_data["name"]) # Fallback to name if image not found
+        pixmap = item_pixmap(item_data)
+        if pixmap is not None:
+            self.setPixmap(pixmap.scaled(self.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
         else:
-            self.setText(item_data["name"])
+            self.setText(item_data["name"]) # Fallback to name if there is no image
 
         self.inventory_tab.mark_item_as_equipped(item_data["id"])
         event.acceptProposedAction()
@@ -104,6 +125,8 @@ class DraggableListWidget(QListWidget):
             item_data = item.data(Qt.ItemDataRole.UserRole)
             mime_data = QMimeData()
             mime_data.setData("application/json", json.dumps(item_data).encode())
+            if get_registry().get_item(item_data.get("id")) == item_data:
+                mime_data.setData(ITEM_ID_MIME_TYPE, item_data["id"].encode())
             
             drag = QDrag(self)
             drag.setMimeData(mime_data)
@@ -177,6 +200,12 @@ class InventoryTab(QWidget):
         self.inventory_tabs.addTab(self.gear_list, "Gear")
         self.inventory_tabs.addTab(self.consumables_list, "Consumables")
         self.inventory_tabs.addTab(self.items_list, "Items")
+
+        # Item type -> list it is filed under; anything else goes to "Items"
+        self.lists_by_type = {
+            "armor": self.gear_list, "weapon": self.gear_list, "accessory": self.gear_list,
+            "consumable": self.consumables_list
+        }
         
         main_layout.addWidget(self.inventory_tabs)
         
@@ -186,10 +215,10 @@ class InventoryTab(QWidget):
 
     def _open_add_item_dialog(self):
         dialog = AddItemDialog(self)
-        if dialog.exec():
-            item_data = dialog.selected_item
-            if item_data:
-                self._add_item_to_list(item_data)
+        accepted = dialog.exec()
+        dialog.deleteLater()
+        if accepted and dialog.selected_item:
+            self._add_item_to_list(dialog.selected_item)
 
     def _add_item_to_list(self, item_data, is_equipped=False):
         list_item = QListWidgetItem(item_data["name"])
@@ -204,12 +233,7 @@ class InventoryTab(QWidget):
             list_item.setForeground(QColor('grey'))
         
         item_type = item_data.get("type", "custom")
-        if item_type in ["armor", "weapon", "accessory"]:
-            self.gear_list.addItem(list_item)
-        elif item_type == "consumable":
-            self.consumables_list.addItem(list_item)
-        else:
-            self.items_list.addItem(list_item)
+        self.lists_by_type.get(item_type, self.items_list).addItem(list_item)
 
     def find_item_in_list(self, item_id):
         for i in range(self.gear_list.count()):
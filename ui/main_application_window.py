@@ -4,6 +4,8 @@ from PyQt6.QtWidgets import QMainWindow, QStackedWidget
 from ui.main_menu_window import MainMenuWindow
 from ui.uvtt_editor_window import UvttEditorWindow
 from ui.character_editor_window import CharacterEditorWindow
+from utils.plugin_registry import get_registry
+from utils.plugin_watcher import get_plugin_watcher
 
 def _resource_path(rel_path: str) -> str:
     base = getattr(sys, "_MEIPASS", None)
@@ -55,6 +57,16 @@ class MainApplicationWindow(QMainWindow):
         # Set initial view
         self.show_main_menu()
 
+        # Load the remaining plugin content in the background while the main menu is showing
+        get_registry().prefetch()
+        # Pick up edits to plugin files while the app is open
+        get_plugin_watcher()
+
+    def closeEvent(self, event):
+        # Child widgets get no close event of their own, the editor has journal writes to finish
+        self.character_editor.close()
+        super().closeEvent(event)
+
     def show_main_menu(self):
         self.stacked_widget.setCurrentWidget(self.main_menu)
         self.menuBar().clear()
@@ -0,0 +1,135 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QCoreApplication, QObject, QTimer, pyqtSignal
+
+from utils.character_file import write_character_file
+from utils.edit_journal import CharacterRecovery
+
+# Recovery files of characters that were never saved are kept next to this (never written) path
+UNTITLED_PATH = 'resources/data/autosave/untitled.dndc'
+
+
+class Autosaver(QObject):
+    """Saves a character sheet on a background thread.
+
+    schedule() is called whenever the sheet changes; once edits pause for DEBOUNCE_MS the
+    sheet is snapshotted on the UI thread (a cheap dict copy, the sprite is passed by
+    reference) and journaled for crash recovery on the worker, so journaling never blocks
+    input. save() writes the character file itself on the same worker, so even a large sprite
+    never blocks input either; saved or save_failed reports the outcome. All disk work runs on
+    one thread, in the order it was requested, and is finished when the application quits.
+    """
+    saved = pyqtSignal(str)
+    save_failed = pyqtSignal(str, str)
+
+    DEBOUNCE_MS = 1500
+
+    def __init__(self, snapshot, parent=None):
+        """snapshot() must return (sheet dict without the sprite, Sprite or None)."""
+        super().__init__(parent)
+        self._snapshot = snapshot
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+        self._recovery = CharacterRecovery(UNTITLED_PATH)
+        self._recovery_lock = threading.Lock()
+        self._shut_down = False
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(self.DEBOUNCE_MS)
+        self._debounce.timeout.connect(self.flush)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    @property
+    def recovery(self):
+        return self._recovery
+
+    def set_path(self, path, sheet=None, sprite=None):
+        """Switches to journaling the character at path (None for an unsaved one).
+
+        sheet and sprite describe what is on disk there, so only later edits are journaled.
+        """
+        self._debounce.stop()
+        recovery = CharacterRecovery(path or UNTITLED_PATH)
+        self._submit(self._switch_recovery, recovery, sheet, sprite)
+
+    def _switch_recovery(self, recovery, sheet, sprite):
+        if sheet is not None:
+            recovery.start(sheet, sprite)
+        with self._recovery_lock:
+            self._recovery = recovery
+
+    def schedule(self):
+        if not self._shut_down:
+            self._debounce.start()
+
+    def flush(self):
+        """Journals the current sheet now instead of waiting for the debounce."""
+        self._debounce.stop()
+        sheet, sprite = self._snapshot()
+        self._submit(self._record, sheet, sprite)
+
+    def _record(self, sheet, sprite):
+        with self._recovery_lock:
+            recovery = self._recovery
+        if recovery.path == UNTITLED_PATH:
+            os.makedirs(os.path.dirname(UNTITLED_PATH), exist_ok=True)
+        recovery.record(sheet, sprite)
+
+    def save(self, path):
+        """Writes the sheet as it is now to path, after any pending journal writes, without waiting.
+
+        Emits saved(path) once the file is written, or save_failed(path, error).
+        """
+        self._debounce.stop()
+        sheet, sprite = self._snapshot()
+        self._submit(self._save, path, sheet, sprite)
+
+    def _save(self, path, sheet, sprite):
+        try:
+            write_character_file(path, sheet, sprite)
+        except Exception as e:
+            # The journal of the old path is kept, so the edits can still be recovered
+            self.save_failed.emit(path, str(e))
+            return
+        with self._recovery_lock:
+            old_recovery = self._recovery
+            self._recovery = CharacterRecovery(path)
+        try:
+            old_recovery.discard()
+            self._recovery.start(sheet, sprite)
+        except OSError:
+            # The file is saved; a leftover journal is only offered for recovery once more
+            pass
+        self.saved.emit(path)
+
+    def discard(self):
+        """Throws the journaled edits away, e.g. when the user discards their changes."""
+        self._debounce.stop()
+        self._submit(self._discard)
+
+    def _discard(self):
+        with self._recovery_lock:
+            recovery = self._recovery
+        recovery.discard()
+
+    def _submit(self, function, *args):
+        future = self._executor.submit(function, *args)
+        future.add_done_callback(_report_errors)
+        return future
+
+    def shutdown(self):
+        """Journals edits still waiting for the debounce and waits for all disk work; safe to call twice."""
+        if self._shut_down:
+            return
+        if self._debounce.isActive():
+            self.flush()
+        self._shut_down = True
+        self._executor.shutdown(wait=True)
+
+
+def _report_errors(future):
+    # Autosave must never take the editor down; a failed journal write is retried on the next edit
+    future.exception()
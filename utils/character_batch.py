@@ -0,0 +1,209 @@
+import sys
+import csv
+import json
+import time
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.character_file import CharacterFileError, iter_character_files, load_character, migrate
+from utils.character_model import Character
+from utils.character_stats import ABILITIES, SKILL_ABILITIES
+from utils.class_progression import MAX_LEVEL
+from utils.rules_engine import RulesEngine
+
+# Files handed to a worker process at a time; large enough that the pool overhead does not show
+CHUNK_SIZE = 64
+PROGRESS_INTERVAL = 0.5
+SUMMARY_FIELDS = ("path", "name", "class", "level", "race", "player_name")
+MIN_ABILITY_SCORE, MAX_ABILITY_SCORE = 1, 30
+
+_rules = RulesEngine()  # replaced in every worker process by _init_worker()
+
+
+def _init_worker(class_data):
+    global _rules
+    _rules = RulesEngine(class_data)
+
+
+def validate_character(character, rules):
+    """Returns a list of problems with a Character, empty if it is valid."""
+    problems = []
+    if not isinstance(character.level, int) or not 1 <= character.level <= MAX_LEVEL:
+        problems.append(f"level {character.level!r} is not between 1 and {MAX_LEVEL}")
+    if rules.class_data and character.class_name not in rules.class_data:
+        problems.append(f"class {character.class_name!r} is not provided by any installed plugin")
+    for ability in ABILITIES:
+        score = character.ability_scores.get(ability)
+        if not isinstance(score, int) or not MIN_ABILITY_SCORE <= score <= MAX_ABILITY_SCORE:
+            problems.append(f"{ability} score {score!r} is not between {MIN_ABILITY_SCORE} and {MAX_ABILITY_SCORE}")
+    for ability in character.save_proficiencies - set(ABILITIES):
+        problems.append(f"unknown saving throw proficiency {ability!r}")
+    for skill in character.skill_proficiencies - SKILL_ABILITIES.keys():
+        problems.append(f"unknown skill proficiency {skill!r}")
+    for name in ("hp_max", "hp_current", "hp_temp", "experience"):
+        value = getattr(character, name)
+        if not isinstance(value, int) or value < 0:
+            problems.append(f"{name} {value!r} is not a non-negative whole number")
+    if character.sprite is not None:
+        try:
+            # Reading the sprite checks its archive entry as well
+            character.sprite.data
+        except Exception as e:
+            problems.append(f"sprite cannot be read: {e}")
+    return problems
+
+
+# region Worker tasks
+# Each runs in a worker process and returns a picklable (path, ok, result) tuple. They never raise:
+# anything a file can trigger is reported as a failure of that file, so one bad file cannot end a run.
+def _validate_file(path):
+    try:
+        problems = validate_character(load_character(path), _rules)
+    except Exception as e:
+        return path, False, [_describe(e)]
+    return path, not problems, problems
+
+
+def _migrate_file(path, backup):
+    try:
+        return path, True, "migrated" if migrate(path, backup=backup) else "already current"
+    except Exception as e:
+        return path, False, _describe(e)
+
+
+def _summarize_file(path):
+    try:
+        character = load_character(path)
+        row = {"path": path, "name": character.name, "class": character.class_name, "level": character.level,
+               "race": character.race, "player_name": character.player_name}
+        row.update(_rules.compute(character))
+    except Exception as e:
+        return path, False, _describe(e)
+    return path, True, row
+
+
+def _describe(error):
+    if isinstance(error, (OSError, CharacterFileError)):
+        return str(error)
+    return f"{type(error).__name__}: {error}"
+# endregion
+
+
+def run(task, paths, class_data=None, jobs=None):
+    """Runs task over paths and yields its results in the order of paths.
+
+    With more than one job the files are spread over a process pool in chunks; results are
+    still yielded as soon as they are ready, so callers can stream them.
+    """
+    if jobs == 1 or len(paths) < CHUNK_SIZE:
+        _init_worker(class_data or {})
+        yield from map(task, paths)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(class_data or {},)) as pool:
+        yield from pool.map(task, paths, chunksize=CHUNK_SIZE)
+
+
+class _Progress:
+    """Writes 'done/total' lines to stderr at most every PROGRESS_INTERVAL seconds."""
+
+    def __init__(self, total, enabled=True):
+        self.total = total
+        self.enabled = enabled
+        self.done = 0
+        self.started = self._last = time.monotonic()
+
+    def step(self):
+        self.done += 1
+        now = time.monotonic()
+        if self.enabled and now - self._last >= PROGRESS_INTERVAL:
+            self._last = now
+            print(f"{self.done}/{self.total} files", file=sys.stderr, flush=True)
+
+    def finish(self, failures):
+        if self.enabled:
+            elapsed = time.monotonic() - self.started
+            print(f"{self.done}/{self.total} files in {elapsed:.1f}s, {failures} failed", file=sys.stderr, flush=True)
+
+
+def _summary_columns(class_data):
+    # dict.fromkeys keeps the order and drops stats that are already summary fields, such as level
+    return list(dict.fromkeys(SUMMARY_FIELDS + tuple(RulesEngine(class_data).compute(Character()))))
+
+
+def _load_class_data():
+    from utils.plugin_registry import get_registry
+    return get_registry().classes_by_name()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.character_batch",
+                                     description="Validates, migrates and exports .dndc character files "
+                                                 "in bulk, without starting the editor.")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes to use (default: one per CPU, 1 runs everything in-process)")
+    parser.add_argument("--no-plugins", action="store_true",
+                        help="do not load plugins; classes are then neither checked nor used for stats")
+    parser.add_argument("--no-progress", action="store_true", help="do not report progress on stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+    validate_parser = commands.add_parser("validate", help="check files for unreadable or out-of-range data")
+    validate_parser.add_argument("paths", nargs="+", help="files or folders (searched recursively)")
+    migrate_parser = commands.add_parser("migrate", help="convert files to the current format in place")
+    migrate_parser.add_argument("paths", nargs="+", help="files or folders (searched recursively)")
+    migrate_parser.add_argument("--no-backup", action="store_true", help="do not keep a .v1.bak copy")
+    migrate_parser.add_argument("-q", "--quiet", action="store_true", help="only print files that failed")
+    export_parser = commands.add_parser("export", help="write a summary with recomputed stats of every file")
+    export_parser.add_argument("paths", nargs="+", help="files or folders (searched recursively)")
+    export_parser.add_argument("-f", "--format", choices=("csv", "json"), default="csv",
+                               help="csv, or json for one JSON object per line (default: csv)")
+    export_parser.add_argument("-o", "--output", help="file to write, defaults to stdout")
+    args = parser.parse_args(argv)
+
+    class_data = {}
+    if not args.no_plugins:
+        class_data = _load_class_data()
+    paths = list(iter_character_files(args.paths))
+    progress = _Progress(len(paths), enabled=not args.no_progress)
+    failures = 0
+
+    if args.command == "validate":
+        for path, ok, problems in run(_validate_file, paths, class_data, args.jobs):
+            progress.step()
+            if not ok:
+                failures += 1
+                for problem in problems:
+                    print(f"{path}: {problem}")
+    elif args.command == "migrate":
+        for path, ok, message in run(partial(_migrate_file, backup=not args.no_backup), paths, class_data, args.jobs):
+            progress.step()
+            if not ok:
+                failures += 1
+                print(f"error: {path}: {message}", file=sys.stderr)
+            elif not args.quiet:
+                print(f"{message}: {path}")
+    else:
+        output = open(args.output, 'w', newline='') if args.output else sys.stdout
+        try:
+            writer = None
+            if args.format == "csv":
+                writer = csv.DictWriter(output, fieldnames=_summary_columns(class_data), extrasaction='ignore')
+                writer.writeheader()
+            for path, ok, row in run(_summarize_file, paths, class_data, args.jobs):
+                progress.step()
+                if not ok:
+                    failures += 1
+                    print(f"error: {path}: {row}", file=sys.stderr)
+                elif writer is not None:
+                    writer.writerow(row)
+                else:
+                    output.write(json.dumps(row) + "\n")
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+    progress.finish(failures)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import zipfile
+import argparse
+
+from utils.character_model import Character, Sprite
+
+EXTENSION = ".dndc"
+FORMAT_VERSION = 2
+MANIFEST_ENTRY = "manifest.json"
+SHEET_ENTRY = "character.json"
+SPRITE_ENTRY = "sprite"  # followed by the image's own extension, e.g. sprite.png
+
+
+class CharacterFileError(Exception):
+    """Raised for files that are neither a v1 nor a v2 .dndc character."""
+
+
+def file_version(path):
+    """Returns 2 for zip based .dndc files and 1 for the original pretty-printed JSON files."""
+    return FORMAT_VERSION if zipfile.is_zipfile(path) else 1
+
+
+def load_character(path):
+    """Reads a .dndc file of either version into a Character.
+
+    For v2 files only the compact sheet JSON is parsed; the sprite stays in the archive until
+    something asks for its bytes.
+    """
+    if file_version(path) == 1:
+        try:
+            with open(path, 'r') as f:
+                return _character_from_sheet(json.load(f))
+        except (TypeError, AttributeError, ValueError) as e:
+            raise CharacterFileError(f"{path} is not a character file: {e}") from e
+
+    try:
+        with zipfile.ZipFile(path) as archive:
+            manifest = json.loads(archive.read(MANIFEST_ENTRY))
+            sheet = json.loads(archive.read(SHEET_ENTRY))
+            if not isinstance(manifest, dict):
+                raise ValueError("the manifest is not a JSON object")
+            version = manifest.get("version", 0)
+            if not isinstance(version, int) or version > FORMAT_VERSION:
+                raise CharacterFileError(f"{path} was saved by a newer version (format {version!r})")
+            sprite_entry = manifest.get("sprite")
+            if sprite_entry is not None and sprite_entry not in archive.namelist():
+                sprite_entry = None
+        character = _character_from_sheet(sheet)
+    except (zipfile.BadZipFile, KeyError, TypeError, AttributeError, ValueError) as e:
+        raise CharacterFileError(f"{path} is not a character file: {e}") from e
+
+    if sprite_entry is not None:
+        character.sprite = Sprite(loader=lambda: _read_entry(path, sprite_entry))
+    return character
+
+
+def _character_from_sheet(sheet):
+    # Character.from_dict trusts the layout, anything malformed surfaces as TypeError/AttributeError/ValueError
+    if not isinstance(sheet, dict):
+        raise ValueError("the sheet is not a JSON object")
+    return Character.from_dict(sheet)
+
+
+def _read_entry(path, name):
+    with zipfile.ZipFile(path) as archive:
+        return archive.read(name)
+
+
+def save_character(path, character):
+    """Writes a Character as a v2 .dndc file, atomically.
+
+    The sheet is stored as compact, compressed JSON and the sprite as its original image bytes
+    in a separate, uncompressed entry (image formats are already compressed).
+    """
+    write_character_file(path, character.to_dict(include_sprite=False), character.sprite)
+
+
+def write_character_file(path, sheet, sprite=None):
+    """Writes a sheet dict (without its sprite) and a Sprite or None as a v2 .dndc file, atomically.
+
+    Only reads from its arguments, so it can run on a worker thread on a snapshot of a sheet.
+    """
+    # Read a lazily loaded sprite before the file it may come from is replaced
+    sprite_data = sprite.data if sprite is not None else None
+    sprite_entry = SPRITE_ENTRY + sprite.extension if sprite_data else None
+    manifest = {"format": "dndc", "version": FORMAT_VERSION, "sprite": sprite_entry}
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        with zipfile.ZipFile(f, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(MANIFEST_ENTRY, json.dumps(manifest))
+            archive.writestr(SHEET_ENTRY, json.dumps(sheet, separators=(",", ":")))
+            if sprite_data:
+                archive.writestr(sprite_entry, sprite_data, compress_type=zipfile.ZIP_STORED)
+        # The new file has to be on disk before it replaces the old one, or a crash could leave neither
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def migrate(path, backup=True):
+    """Converts a v1 .dndc file to v2 in place; returns False if it already was v2."""
+    if file_version(path) == FORMAT_VERSION:
+        return False
+    character = load_character(path)
+    if backup:
+        with open(path, 'rb') as source, open(path + '.v1.bak', 'wb') as target:
+            target.write(source.read())
+    save_character(path, character)
+    return True
+
+
+def iter_character_files(paths):
+    """Yields the given files and every .dndc file below the given folders."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for filename in sorted(files):
+                    if filename.endswith(EXTENSION):
+                        yield os.path.join(root, filename)
+        else:
+            yield path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.character_file",
+                                     description="Converts .dndc character files to the current format.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = commands.add_parser("migrate", help="convert v1 files (or folders of them) to v2 in place")
+    migrate_parser.add_argument("paths", nargs="+")
+    migrate_parser.add_argument("--no-backup", action="store_true", help="do not keep a .v1.bak copy")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for path in iter_character_files(args.paths):
+        try:
+            migrated = migrate(path, backup=not args.no_backup)
+        except (OSError, CharacterFileError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            failures += 1
+            continue
+        print(f"{'migrated' if migrated else 'already v2'}: {path}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import os
+import sqlite3
+
+from utils.character_file import EXTENSION, CharacterFileError, load_character
+
+LIBRARY_PATH = 'resources/data/character_library.sqlite3'
+# Bump whenever the schema or the meaning of a column changes; the index is then rebuilt
+SCHEMA_VERSION = 1
+SORT_COLUMNS = ("name", "class_name", "level", "race", "player_name", "mtime_ns")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (path TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS characters (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    class_name TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    race TEXT NOT NULL,
+    player_name TEXT NOT NULL,
+    search_text TEXT NOT NULL,
+    thumbnail BLOB
+);
+CREATE INDEX IF NOT EXISTS characters_folder ON characters (folder);
+CREATE INDEX IF NOT EXISTS characters_name ON characters (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS characters_class ON characters (class_name, level);
+"""
+
+
+class LibraryEntry:
+    """The indexed summary of one character file; the sheet itself is only read when it is opened."""
+    __slots__ = ('path', 'mtime_ns', 'name', 'class_name', 'level', 'race', 'player_name', 'has_thumbnail')
+
+    def __init__(self, path, mtime_ns, name, class_name, level, race, player_name, has_thumbnail=False):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.name = name
+        self.class_name = class_name
+        self.level = level
+        self.race = race
+        self.player_name = player_name
+        self.has_thumbnail = bool(has_thumbnail)
+
+    def __repr__(self):
+        return f"LibraryEntry({self.path!r}, name={self.name!r})"
+
+
+class CharacterLibrary:
+    """A SQLite index of the .dndc files in a set of folders.
+
+    scan() stats every file and only re-reads the ones whose mtime or size changed since the
+    last scan, so keeping the index current costs a directory walk. Sorting, filtering and
+    searching are answered from the index alone. thumbnailer, if given, turns a sprite's
+    image bytes into the small image stored with each entry (or None).
+    """
+
+    def __init__(self, path=LIBRARY_PATH, thumbnailer=None):
+        self.path = path
+        self.thumbnailer = thumbnailer
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            with self._db:
+                self._db.execute("DROP TABLE IF EXISTS characters")
+                self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM characters").fetchone()[0]
+
+    # region Folders
+    def folders(self):
+        return [row[0] for row in self._db.execute("SELECT path FROM folders ORDER BY path")]
+
+    def add_folder(self, folder):
+        """Adds a folder (searched recursively) to the library; returns False if it is already covered."""
+        folder = os.path.abspath(folder)
+        if self._folder_of(os.path.join(folder, '')) is not None:
+            return False
+        with self._db:
+            cursor = self._db.execute("INSERT OR IGNORE INTO folders (path) VALUES (?)", (folder,))
+        return cursor.rowcount > 0
+
+    def remove_folder(self, folder):
+        folder = os.path.abspath(folder)
+        with self._db:
+            self._db.execute("DELETE FROM folders WHERE path = ?", (folder,))
+            self._db.execute("DELETE FROM characters WHERE folder = ?", (folder,))
+    # endregion
+
+    # region Indexing
+    def scan(self, errors=None):
+        """Brings the index up to date with the library folders; returns (updated, removed) counts.
+
+        Files that cannot be read as characters are left out and, if errors is a list, reported
+        in it as (path, message) pairs.
+        """
+        updated = removed = 0
+        with self._db:
+            for folder in self.folders():
+                known = {path: (mtime_ns, size) for path, mtime_ns, size in self._db.execute(
+                    "SELECT path, mtime_ns, size FROM characters WHERE folder = ?", (folder,))}
+                for path, stat in _iter_character_files(folder):
+                    if known.pop(path, None) == (stat.st_mtime_ns, stat.st_size):
+                        continue
+                    if self._index_file(folder, path, stat, errors):
+                        updated += 1
+                    else:
+                        self._db.execute("DELETE FROM characters WHERE path = ?", (path,))
+                # Whatever was not seen on disk any more has been deleted or moved
+                for path in known:
+                    self._db.execute("DELETE FROM characters WHERE path = ?", (path,))
+                removed += len(known)
+        return updated, removed
+
+    def refresh(self, path):
+        """Re-indexes a single file, e.g. right after it was saved; returns False if it is not in the library."""
+        path = os.path.abspath(path)
+        folder = self._folder_of(path)
+        if folder is None:
+            return False
+        with self._db:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self._db.execute("DELETE FROM characters WHERE path = ?", (path,))
+                return False
+            return self._index_file(folder, path, stat, None)
+
+    def _folder_of(self, path):
+        for folder in self.folders():
+            if path.startswith(os.path.join(folder, '')):
+                return folder
+        return None
+
+    def _index_file(self, folder, path, stat, errors):
+        try:
+            character = load_character(path)
+        except Exception as e:
+            # One unreadable file must not stop the scan of a whole folder
+            if errors is not None:
+                errors.append((path, str(e) if isinstance(e, (OSError, CharacterFileError)) else f"{type(e).__name__}: {e}"))
+            return False
+        thumbnail = None
+        try:
+            if self.thumbnailer is not None and character.sprite is not None and character.sprite.data:
+                thumbnail = self.thumbnailer(character.sprite.data)
+        except Exception:
+            # Listed without a picture; a broken sprite is reported when the character is opened
+            thumbnail = None
+        try:
+            level = int(character.level)
+        except (TypeError, ValueError):
+            level = 0
+        fields = [str(value or "") for value in (character.name, character.class_name, character.race,
+                                                  character.player_name)]
+        self._db.execute(
+            "INSERT OR REPLACE INTO characters (path, folder, mtime_ns, size, name, class_name, level, race,"
+            " player_name, search_text, thumbnail) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, folder, stat.st_mtime_ns, stat.st_size, fields[0], fields[1], level, fields[2], fields[3],
+             " ".join(fields).lower(), thumbnail))
+        return True
+    # endregion
+
+    # region Queries
+    def query(self, text="", class_name=None, sort="name", descending=False, limit=None):
+        """Returns LibraryEntry objects matching every word of text, optionally only of one class.
+
+        Words are matched anywhere in the name, class, race or player name, case-insensitively.
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort the library by {sort!r}")
+        conditions = []
+        params = []
+        for word in text.lower().split():
+            conditions.append("search_text LIKE ? ESCAPE '\\'")
+            params.append("%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if class_name:
+            conditions.append("class_name = ?")
+            params.append(class_name)
+        # Thumbnails are only flagged here, thumbnail() fetches the few that are actually shown
+        sql = ("SELECT path, mtime_ns, name, class_name, level, race, player_name, thumbnail IS NOT NULL"
+               " FROM characters")
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        collate = " COLLATE NOCASE" if sort not in ("level", "mtime_ns") else ""
+        direction = " DESC" if descending else ""
+        sql += f" ORDER BY {sort}{collate}{direction}, name COLLATE NOCASE, path"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [LibraryEntry(*row) for row in self._db.execute(sql, params)]
+
+    def class_names(self):
+        return [row[0] for row in self._db.execute(
+            "SELECT DISTINCT class_name FROM characters WHERE class_name != '' ORDER BY class_name")]
+
+    def thumbnail(self, path):
+        row = self._db.execute("SELECT thumbnail FROM characters WHERE path = ?", (path,)).fetchone()
+        return row[0] if row is not None else None
+    # endregion
+
+
+def _iter_character_files(folder):
+    """Yields (path, stat) for every .dndc file below folder."""
+    stack = [folder]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.name.endswith(EXTENSION):
+                try:
+                    yield entry.path, entry.stat()
+                except OSError:
+                    continue
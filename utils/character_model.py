@@ -0,0 +1,163 @@
+import base64
+
+from utils.character_stats import ABILITIES
+
+ROLEPLAY_FIELDS = ("personality", "ideals", "bonds", "flaws", "allies", "backstory")
+INVENTORY_LISTS = ("gear", "consumables", "items")
+_IMAGE_EXTENSIONS = ((b'\x89PNG', ".png"), (b'\xff\xd8', ".jpg"), (b'BM', ".bmp"), (b'GIF8', ".gif"))
+
+
+class Sprite:
+    """A character portrait whose bytes are only read or decoded the first time they are needed."""
+    __slots__ = ('_data', '_loader')
+
+    def __init__(self, data=None, loader=None):
+        self._data = data
+        self._loader = loader
+
+    @classmethod
+    def from_base64(cls, text):
+        return cls(loader=lambda: base64.b64decode(text))
+
+    @property
+    def is_loaded(self):
+        return self._data is not None
+
+    @property
+    def data(self):
+        if self._data is None and self._loader is not None:
+            self._data = self._loader()
+            self._loader = None
+        return self._data
+
+    @property
+    def extension(self):
+        data = self.data or b""
+        for magic, extension in _IMAGE_EXTENSIONS:
+            if data.startswith(magic):
+                return extension
+        return ".img"
+
+    def to_base64(self):
+        return base64.b64encode(self.data).decode('utf-8')
+
+
+class Character:
+    """The state of one character sheet, independent of any UI.
+
+    Reads and writes the same dict layout as the .dndc files (see from_dict() and to_dict());
+    keys this version does not know about are kept in `extra` so they survive a round trip.
+    The portrait is a Sprite, or None.
+    """
+    __slots__ = ('name', 'level', 'class_name', 'race', 'background', 'alignment', 'player_name',
+                 'experience', 'inspiration', 'hp_max', 'hp_current', 'hp_temp', 'ac', 'speed',
+                 'hit_dice_current', 'death_save_successes', 'death_save_failures', 'ability_scores',
+                 'save_proficiencies', 'skill_proficiencies', 'roleplay', 'equipment', 'inventory',
+                 'sprite', 'extra')
+
+    def __init__(self):
+        self.name = ""
+        self.level = 1
+        self.class_name = ""
+        self.race = ""
+        self.background = ""
+        self.alignment = ""
+        self.player_name = ""
+        self.experience = 0
+        self.inspiration = 0
+        self.hp_max = 0
+        self.hp_current = 0
+        self.hp_temp = 0
+        self.ac = ""
+        self.speed = ""
+        self.hit_dice_current = 0
+        self.death_save_successes = [False, False, False]
+        self.death_save_failures = [False, False, False]
+        self.ability_scores = {ability: 10 for ability in ABILITIES}
+        self.save_proficiencies = set()
+        self.skill_proficiencies = set()
+        self.roleplay = {field: "" for field in ROLEPLAY_FIELDS}
+        self.equipment = {}
+        self.inventory = {name: [] for name in INVENTORY_LISTS}
+        self.sprite = None
+        self.extra = {}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a Character from the dict stored in a .dndc file."""
+        character = cls()
+        data = dict(data)
+        character.name = data.pop('name', "")
+        character.level = data.pop('level', 1)
+        character.class_name = data.pop('class', "")
+        character.race = data.pop('race', "")
+        character.background = data.pop('background', "")
+        character.alignment = data.pop('alignment', "")
+        character.player_name = data.pop('player_name', "")
+        character.experience = data.pop('experience', 0)
+        character.inspiration = data.pop('inspiration', 0)
+        character.hp_max = data.pop('hp_max', 0)
+        character.hp_current = data.pop('hp_current', 0)
+        character.hp_temp = data.pop('hp_temp', 0)
+        character.ac = data.pop('ac', "")
+        character.speed = data.pop('speed', "")
+        character.hit_dice_current = data.pop('hit_dice_current', 0)
+        death_saves = data.pop('death_saves', {})
+        character.death_save_successes = _three_flags(death_saves.get('successes', []))
+        character.death_save_failures = _three_flags(death_saves.get('failures', []))
+        character.ability_scores.update(data.pop('ability_scores', {}))
+        proficiencies = data.pop('proficiencies', {})
+        character.save_proficiencies = set(proficiencies.get('saves', []))
+        character.skill_proficiencies = set(proficiencies.get('skills', []))
+        character.roleplay.update(data.pop('roleplay', {}))
+        character.equipment = dict(data.pop('equipment', {}))
+        inventory = data.pop('inventory', {})
+        for name in INVENTORY_LISTS:
+            character.inventory[name] = list(inventory.get(name, []))
+        sprite = data.pop('sprite', None)
+        character.sprite = Sprite.from_base64(sprite) if sprite else None
+        character.extra = data
+        return character
+
+    def to_dict(self, include_sprite=True):
+        """Returns the dict layout stored in .dndc files, with the sprite as base64 text unless excluded."""
+        data = dict(self.extra)
+        data.update({
+            'name': self.name,
+            'level': self.level,
+            'class': self.class_name,
+            'race': self.race,
+            'background': self.background,
+            'alignment': self.alignment,
+            'player_name': self.player_name,
+            'experience': self.experience,
+            'inspiration': self.inspiration,
+            'hp_max': self.hp_max,
+            'hp_current': self.hp_current,
+            'hp_temp': self.hp_temp,
+            'ac': self.ac,
+            'speed': self.speed,
+            'hit_dice_current': self.hit_dice_current,
+            'death_saves': {
+                'successes': list(self.death_save_successes),
+                'failures': list(self.death_save_failures),
+            },
+            'ability_scores': dict(self.ability_scores),
+            'proficiencies': {
+                'saves': [ability for ability in ABILITIES if ability in self.save_proficiencies],
+                'skills': sorted(self.skill_proficiencies),
+            },
+            'roleplay': dict(self.roleplay),
+            'equipment': dict(self.equipment),
+            'inventory': {name: list(items) for name, items in self.inventory.items()},
+        })
+        if include_sprite and self.sprite is not None and self.sprite.data:
+            data['sprite'] = self.sprite.to_base64()
+        return data
+
+    def __repr__(self):
+        return f"Character({self.name!r}, level={self.level}, class_name={self.class_name!r})"
+
+
+def _three_flags(flags):
+    return [bool(flag) for flag in list(flags)[:3]] + [False] * (3 - min(len(flags), 3))
@@ -0,0 +1,115 @@
+from utils.stat_graph import StatGraph
+
+ABILITIES = ("strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma")
+SKILL_ABILITIES = {
+    "acrobatics": "dexterity", "animal_handling": "wisdom", "arcana": "intelligence", "athletics": "strength",
+    "deception": "charisma", "history": "intelligence", "insight": "wisdom", "intimidation": "charisma",
+    "investigation": "intelligence", "medicine": "wisdom", "nature": "intelligence", "perception": "wisdom",
+    "performance": "charisma", "persuasion": "charisma", "religion": "intelligence",
+    "sleight_of_hand": "dexterity", "stealth": "dexterity", "survival": "wisdom",
+}
+
+
+# Node names, so callers never build the strings themselves
+def score(ability):
+    return f"score.{ability}"
+
+
+def modifier(ability):
+    return f"modifier.{ability}"
+
+
+def save_proficient(ability):
+    return f"save_proficient.{ability}"
+
+
+def save(ability):
+    return f"save.{ability}"
+
+
+def skill_proficient(skill):
+    return f"skill_proficient.{skill}"
+
+
+def skill(skill_name):
+    return f"skill.{skill_name}"
+
+
+def ability_modifier(ability_score):
+    return (ability_score - 10) // 2
+
+
+def proficiency_bonus(level):
+    return (level - 1) // 4 + 2
+
+
+def format_modifier(value):
+    """Formats a bonus the way the sheet shows it, e.g. +3 or -1."""
+    return f"+{value}" if value >= 0 else str(value)
+
+
+def _with_proficiency(base, proficient, bonus):
+    return base + bonus if proficient else base
+
+
+def _input_defaults():
+    defaults = {"level": 1, "hit_die": "d6"}
+    for ability in ABILITIES:
+        defaults[score(ability)] = 10
+        defaults[save_proficient(ability)] = False
+    for skill_name in SKILL_ABILITIES:
+        defaults[skill_proficient(skill_name)] = False
+    return defaults
+
+
+def _stat_formulas():
+    formulas = [("proficiency_bonus", proficiency_bonus, ("level",))]
+    for ability in ABILITIES:
+        formulas.append((modifier(ability), ability_modifier, (score(ability),)))
+        formulas.append((save(ability), _with_proficiency,
+                         (modifier(ability), save_proficient(ability), "proficiency_bonus")))
+    for skill_name, ability in SKILL_ABILITIES.items():
+        formulas.append((skill(skill_name), _with_proficiency,
+                         (modifier(ability), skill_proficient(skill_name), "proficiency_bonus")))
+    formulas.append(("initiative", lambda dexterity: dexterity, (modifier("dexterity"),)))
+    formulas.append(("hit_dice_total", lambda total, die: f"{total}{die}", ("level", "hit_die")))
+    return tuple(formulas)
+
+
+INPUT_DEFAULTS = _input_defaults()
+# (name, formula, dependencies) of every derived stat, each depending only on inputs and earlier
+# entries. Both build_character_graph() and compute_stats() evaluate this one table.
+STAT_FORMULAS = _stat_formulas()
+
+
+def build_character_graph(level=1, ability_scores=None, hit_die="d6"):
+    """Builds the StatGraph of a 5e character sheet.
+
+    Inputs: "level", "hit_die", score.<ability>, save_proficient.<ability> and
+    skill_proficient.<skill>. Derived: "proficiency_bonus", modifier.<ability>, save.<ability>,
+    skill.<skill>, "initiative" and "hit_dice_total". Further derived stats (armor class,
+    spell save DC, carrying capacity, ...) are added with graph.add_derived().
+    """
+    ability_scores = ability_scores or {}
+    inputs = {**INPUT_DEFAULTS, "level": level, "hit_die": hit_die}
+    for ability in ABILITIES:
+        inputs[score(ability)] = ability_scores.get(ability, 10)
+    graph = StatGraph()
+    for name, value in inputs.items():
+        graph.add_input(name, value)
+    for name, formula, dependencies in STAT_FORMULAS:
+        graph.add_derived(name, formula, dependencies)
+    return graph
+
+
+def compute_stats(inputs):
+    """Evaluates STAT_FORMULAS once over {input name: value}, without building a StatGraph.
+
+    Missing inputs take their defaults. Returns {stat name: value} of the derived stats, in
+    STAT_FORMULAS order.
+    """
+    values = {**INPUT_DEFAULTS, **inputs}
+    derived = {}
+    for name, formula, dependencies in STAT_FORMULAS:
+        values[name] = derived[name] = formula(*[values[dependency] for dependency in dependencies])
+    return derived
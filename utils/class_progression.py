@@ -0,0 +1,191 @@
+MAX_LEVEL = 20
+# Placeholders in a class's feature list that stand for whatever the chosen subclass grants
+SUBCLASS_CHOICE = "subclass"
+SUBCLASS_FEATURE = "subclass_feature"
+_PLACEHOLDERS = (SUBCLASS_CHOICE, SUBCLASS_FEATURE)
+
+
+class FeatureRecord:
+    """One feature gained at a level, with its reference already resolved."""
+    __slots__ = ('feature_id', 'level', 'value', 'data')
+
+    def __init__(self, feature_id, level, value, data):
+        self.feature_id = feature_id
+        self.level = level
+        self.value = value
+        self.data = data
+
+    @property
+    def is_placeholder(self):
+        return self.feature_id in _PLACEHOLDERS
+
+    @property
+    def name(self):
+        if self.data and self.data.get("name"):
+            return self.data["name"]
+        return self.feature_id.rsplit("/", 1)[-1].replace("_", " ").title()
+
+    def __repr__(self):
+        return f"FeatureRecord({self.feature_id!r}, level={self.level}, value={self.value!r})"
+
+
+class ClassProgression:
+    """A class (or subclass) compiled into level-indexed tables.
+
+    levels[n] holds the FeatureRecords gained at level n (index 0 is unused). Every feature
+    also has a cumulative value column, so value_at("global/extra_attack", 11) is a single
+    list lookup: the latest "value" given at or below that level, or the number of times the
+    feature was gained for features listed without one.
+    """
+
+    def __init__(self, class_id, levels, values, subclass_levels, spell_slots, cantrips_known, dangling):
+        self.class_id = class_id
+        self.levels = levels
+        self.subclass_levels = subclass_levels
+        self.dangling = dangling  # [(level, feature_id)] references that did not resolve
+        self._values = values
+        self._spell_slots = spell_slots
+        self._cantrips_known = cantrips_known
+
+    def features_at(self, level):
+        """Returns the FeatureRecords gained at exactly this level."""
+        return self.levels[level] if 0 < level <= MAX_LEVEL else ()
+
+    def features_up_to(self, level):
+        """Returns every FeatureRecord gained from level 1 up to and including level."""
+        return [record for records in self.levels[1:min(level, MAX_LEVEL) + 1] for record in records]
+
+    def value_at(self, feature_id, level):
+        """Returns the cumulative value of a feature at a level, 0 if it was not gained yet."""
+        column = self._values.get(feature_id)
+        if column is None or level <= 0:
+            return 0
+        return column[min(level, MAX_LEVEL)]
+
+    def has_feature(self, feature_id, level):
+        return self.value_at(feature_id, level) != 0
+
+    def feature_ids(self):
+        return self._values.keys()
+
+    def spell_slots_at(self, level):
+        """Returns {spell level: slots} at a class level, empty for non-casters."""
+        if not self._spell_slots or level <= 0:
+            return {}
+        return self._spell_slots[min(level, MAX_LEVEL)]
+
+    def cantrips_known_at(self, level):
+        if not self._cantrips_known or level <= 0:
+            return 0
+        return self._cantrips_known[min(level, MAX_LEVEL)]
+
+    def __repr__(self):
+        return f"ClassProgression({self.class_id!r})"
+
+
+def _parse_level(key):
+    try:
+        level = int(key)
+    except (TypeError, ValueError):
+        return None
+    return level if 0 < level <= MAX_LEVEL else None
+
+
+def _level_table(values):
+    """Turns a per-level list (index 0 = level 1) into a column indexed by level."""
+    if not isinstance(values, list) or not values:
+        return None
+    column = [0] + values[:MAX_LEVEL]
+    column.extend([column[-1]] * (MAX_LEVEL + 1 - len(column)))
+    return column
+
+
+def _compile_spellcasting(spellcasting):
+    if not isinstance(spellcasting, dict):
+        return None, None
+    cantrips_known = _level_table(spellcasting.get("cantrips_known"))
+    slot_columns = {}
+    for spell_level, slots in (spellcasting.get("spell_slots") or {}).items():
+        column = _level_table(slots)
+        if column is not None and _parse_level(spell_level) is not None:
+            slot_columns[int(spell_level)] = column
+    if not slot_columns:
+        return None, cantrips_known
+    spell_slots = [{}]
+    for level in range(1, MAX_LEVEL + 1):
+        spell_slots.append({spell_level: column[level] for spell_level, column in sorted(slot_columns.items())
+                            if column[level]})
+    return spell_slots, cantrips_known
+
+
+def compile_progression(class_id, data, features):
+    """Compiles a class or subclass JSON into a ClassProgression.
+
+    features is the {feature_id: data} content used to resolve references; references that
+    are not found still get a record (with data=None) and are listed in progression.dangling.
+    """
+    levels = [[] for _ in range(MAX_LEVEL + 1)]
+    changes = {}  # feature_id -> [(level, value)]
+    dangling = []
+    subclass_levels = []
+    raw_features = data.get("features") if isinstance(data, dict) else None
+
+    for key, entries in (raw_features or {}).items():
+        level = _parse_level(key)
+        if level is None:
+            continue
+        for entry in entries:
+            if isinstance(entry, dict):
+                feature_id, value = entry.get("feature"), entry.get("value")
+            else:
+                feature_id, value = entry, None
+            if not isinstance(feature_id, str):
+                continue
+            if feature_id in _PLACEHOLDERS:
+                subclass_levels.append(level)
+                levels[level].append(FeatureRecord(feature_id, level, value, None))
+                continue
+            feature_data = features.get(feature_id)
+            if feature_data is None:
+                dangling.append((level, feature_id))
+            levels[level].append(FeatureRecord(feature_id, level, value, feature_data))
+            changes.setdefault(feature_id, []).append((level, value))
+
+    values = {}
+    for feature_id, feature_changes in changes.items():
+        feature_changes.sort(key=lambda change: change[0])
+        column = [0] * (MAX_LEVEL + 1)
+        current, gained, i = 0, 0, 0
+        for level in range(1, MAX_LEVEL + 1):
+            while i < len(feature_changes) and feature_changes[i][0] == level:
+                gained += 1
+                value = feature_changes[i][1]
+                current = value if value is not None else gained
+                i += 1
+            column[level] = current
+        values[feature_id] = column
+
+    spell_slots, cantrips_known = _compile_spellcasting(data.get("spellcasting") if isinstance(data, dict) else None)
+    return ClassProgression(class_id, tuple(tuple(records) for records in levels), values,
+                            tuple(sorted(set(subclass_levels))), spell_slots, cantrips_known, sorted(dangling))
+
+
+def preview_level_up(progressions, class_levels, class_id):
+    """Describes what taking one more level in class_id would grant a (multiclass) character.
+
+    progressions maps class ids to ClassProgressions and class_levels the character's current
+    {class_id: level}. Returns (new_class_level, records gained, {feature_id: (old, new)} for
+    every feature gained, before and after the level).
+    """
+    progression = progressions[class_id]
+    old_level = class_levels.get(class_id, 0)
+    new_level = old_level + 1
+    if new_level > MAX_LEVEL:
+        return old_level, (), {}
+    gained = progression.features_at(new_level)
+    changed = {}
+    for record in gained:
+        if not record.is_placeholder and record.feature_id not in changed:
+            changed[record.feature_id] = (progression.value_at(record.feature_id, old_level),
+                                          progression.value_at(record.feature_id, new_level))
+    return new_level, gained, changed
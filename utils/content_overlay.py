@@ -0,0 +1,64 @@
+PATCH_KEY = "$patch"
+PATCH_MERGE = "merge"
+
+
+def is_patch(data):
+    """Returns True for content files that patch an entry of a lower plugin instead of replacing it.
+
+    A patch is a normal content file with "$patch": "merge" and only the fields it changes.
+    """
+    return isinstance(data, dict) and data.get(PATCH_KEY) == PATCH_MERGE
+
+
+def apply_patch(base, patch):
+    """Applies a JSON merge patch (RFC 7386) to base and returns the result.
+
+    Objects are merged key by key, null removes a key and anything else replaces the value.
+    Neither argument is modified: the result shares every untouched sub-object with base, so
+    a patch only costs memory for the path down to the fields it changes.
+    """
+    if not isinstance(patch, dict):
+        return patch
+    if not isinstance(base, dict):
+        base = {}
+    result = dict(base)
+    for key, value in patch.items():
+        if key == PATCH_KEY:
+            continue
+        if value is None:
+            result.pop(key, None)
+        elif isinstance(value, dict):
+            result[key] = apply_patch(base.get(key), value)
+        else:
+            result[key] = value
+    return result
+
+
+def resolve_layers(layers):
+    """Resolves the layers of one entry, lowest plugin first, into its effective data.
+
+    layers is a list of (plugin_id, data) pairs. The topmost full file is the base and the
+    patches above it are applied in order. Returns (data, base plugin_id, field_sources), where
+    field_sources maps the top-level fields a patch set to the plugin_id of the last patch that
+    set them, so assets such as an item's "image" are looked up in the plugin that named them.
+    Returns (None, None, {}) if there is no full file to patch.
+    """
+    start = None
+    for i in range(len(layers) - 1, -1, -1):
+        if not is_patch(layers[i][1]):
+            start = i
+            break
+    if start is None:
+        return None, None, {}
+    base_id, data = layers[start]
+    field_sources = {}
+    for plugin_id, patch in layers[start + 1:]:
+        data = apply_patch(data, patch)
+        for key, value in patch.items():
+            if key == PATCH_KEY:
+                continue
+            if value is None:
+                field_sources.pop(key, None)
+            else:
+                field_sources[key] = plugin_id
+    return data, base_id, field_sources
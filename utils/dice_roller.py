@@ -1,5 +1,13 @@
 import re
+import math
+import heapq
 import random
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for bulk rolling
+    np = None
 
 
 def roll_dice(num_dice, num_sides):
@@ -7,85 +15,733 @@ def roll_dice(num_dice, num_sides):
     return [random.randint(1, num_sides) for _ in range(num_dice)]
 
 
+def split_damage_string(damage):
+    """Splits an item damage string like '2d6 + 1d4 fire' into ('2d6 + 1d4', 'fire').
+
+    The damage type is whatever trailing words follow the expression; it is None if there are none.
+    """
+    match = _DAMAGE_TYPE_RE.match(damage)
+    if match:
+        return match.group(1).strip(), match.group(2).strip().lower()
+    return damage.strip(), None
+
+
 def parse_and_roll(component):
-    """Parses a single dice string component (e.g., '4d6kh3', '1d20A') and returns the rolls and total."""
-    component = component.strip()
-    
-    # Regex to capture the core dice, and the optional modifier part
-    match = re.match(r'(\d+)d(\d+)(.*)', component, re.IGNORECASE)
-    if not match:
-        # Handle flat numbers like "+ 5"
-        if component.isdigit():
-            val = int(component)
-            return {'component': component, 'rolls': [val], 'total': val, 'text': f"{component} = {val}"}
+    """Parses a single dice string component (e.g., '4d6kh3', '1d20A') and returns the rolls and total.
+
+    A trailing damage type, as in '1d8 piercing', is ignored.
+    """
+    try:
+        results, _ = compile(split_damage_string(component)[0]).roll()
+    except ValueError:
         return None
+    return results[0] if len(results) == 1 else None
+
+
+# region Compiled Expressions
+# A dice string is tokenized and parsed once into a small AST, constant sub-expressions are
+# folded, and the tree is turned into a chain of closures. Rolling a compiled expression never
+# touches the regex engine again.
+
+_TOKEN_RE = re.compile(r'\s*(?:(\d*)d(\d+)(kh\d+|kl\d+|a|d)?|(\d+)|([-+*()]))', re.IGNORECASE)
+# Words after the last die, number or parenthesis, separated by whitespace, e.g. "1d8 piercing"
+_DAMAGE_TYPE_RE = re.compile(r'^\s*(.*?[\d)])\s+([A-Za-z][A-Za-z\s-]*)$')
+
+
+class Constant:
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Dice:
+    __slots__ = ('count', 'sides', 'mode', 'keep', 'source')
+
+    def __init__(self, count, sides, mode, keep, source):
+        self.count = count
+        self.sides = sides
+        self.mode = mode  # 'sum', 'kh', 'kl', 'adv' or 'dis'
+        self.keep = keep
+        self.source = source
+
+
+class BinaryOp:
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+
+class Negate:
+    __slots__ = ('operand',)
+
+    def __init__(self, operand):
+        self.operand = operand
+
+
+def _tokenize(dice_string):
+    """Splits a dice string into ('dice', Dice), ('num', int) and ('op', str) tokens."""
+    tokens = []
+    pos = 0
+    text = dice_string.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Unexpected input in dice string at position {pos}: {text[pos:]!r}")
+        count, sides, modifier, number, op = match.groups()
+        if sides is not None:
+            count = int(count) if count else 1
+            sides = int(sides)
+            if sides < 1:
+                raise ValueError(f"Dice must have at least one side: {match.group(0).strip()!r}")
+            modifier = (modifier or '').lower()
+            mode, keep = 'sum', count
+            if modifier in ('a', 'd'):
+                if count != 1: # Advantage/Disadvantage applies to a single roll
+                    raise ValueError(f"Advantage/disadvantage requires a single die: {match.group(0).strip()!r}")
+                mode = 'adv' if modifier == 'a' else 'dis'
+            elif modifier:
+                mode, keep = modifier[:2], min(int(modifier[2:]), count)
+            tokens.append(('dice', Dice(count, sides, mode, keep, match.group(0).strip())))
+        elif number is not None:
+            tokens.append(('num', int(number)))
+        else:
+            tokens.append(('op', op))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser: expr := term (('+'|'-') term)*, term := factor ('*' factor)*."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
+
+    def _peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else (None, None)
+
+    def _take(self):
+        token = self._peek()
+        self.index += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("Empty dice string")
+        node = self._expr()
+        if self.index != len(self.tokens):
+            raise ValueError(f"Unexpected token {self._peek()[1]!r} in dice string")
+        return node
+
+    def _expr(self):
+        node = self._term()
+        while self._peek() in (('op', '+'), ('op', '-')):
+            op = self._take()[1]
+            node = _fold(BinaryOp(op, node, self._term()))
+        return node
+
+    def _term(self):
+        node = self._factor()
+        while self._peek() == ('op', '*'):
+            self._take()
+            node = _fold(BinaryOp('*', node, self._factor()))
+        return node
+
+    def _factor(self):
+        kind, value = self._take()
+        if kind == 'dice':
+            return value
+        if kind == 'num':
+            return Constant(value)
+        if value == '-':
+            return _fold(Negate(self._factor()))
+        if value == '+':
+            return self._factor()
+        if value == '(':
+            node = self._expr()
+            if self._take() != ('op', ')'):
+                raise ValueError("Unbalanced parentheses in dice string")
+            return node
+        raise ValueError(f"Unexpected token {value!r} in dice string")
+
 
-    num_dice, num_sides, modifier = match.groups()
-    num_dice, num_sides = int(num_dice), int(num_sides)
-    modifier = modifier.lower()
+def _fold(node):
+    """Collapses operations whose operands are all constants."""
+    if isinstance(node, Negate) and isinstance(node.operand, Constant):
+        return Constant(-node.operand.value)
+    if isinstance(node, BinaryOp) and isinstance(node.left, Constant) and isinstance(node.right, Constant):
+        return Constant(_apply(node.op, node.left.value, node.right.value))
+    return node
 
-    rolls = roll_dice(num_dice, num_sides)
-    original_rolls = list(rolls)
+
+def _apply(op, left, right):
+    if op == '+':
+        return left + right
+    if op == '-':
+        return left - right
+    return left * right
+
+
+def _split_terms(node, sign=1):
+    """Flattens the top-level sum into (sign, node) pairs so each term can be reported separately."""
+    if isinstance(node, BinaryOp) and node.op in '+-':
+        return _split_terms(node.left, sign) + _split_terms(node.right, sign if node.op == '+' else -sign)
+    if isinstance(node, Negate):
+        return _split_terms(node.operand, -sign)
+    return [(sign, node)]
+
+
+def _describe(node):
+    """Renders a node back into canonical dice notation."""
+    if isinstance(node, Constant):
+        return str(node.value)
+    if isinstance(node, Dice):
+        return node.source
+    if isinstance(node, Negate):
+        return f"-{_describe(node.operand)}"
+    left, right = _describe(node.left), _describe(node.right)
+    if node.op == '*':
+        if isinstance(node.left, BinaryOp) and node.left.op != '*':
+            left = f"({left})"
+        if isinstance(node.right, BinaryOp) and node.right.op != '*':
+            right = f"({right})"
+    elif node.op == '-' and isinstance(node.right, BinaryOp) and node.right.op != '*':
+        right = f"({right})"
+    return f"{left} {node.op} {right}"
+
+
+# Pools at least this large (and with no more sides than dice) are rolled as per-face counts
+LARGE_POOL_THRESHOLD = 1000
+
+
+def _roll_face_counts(count, sides):
+    """Rolls `count` dice and returns how many landed on each face, as a list indexed by face - 1."""
+    if np is not None:
+        # One multinomial draw, seeded from `random` so random.seed() keeps large pools reproducible
+        rng = np.random.default_rng(random.getrandbits(64))
+        return rng.multinomial(count, np.full(sides, 1.0 / sides)).tolist()
+    face_counts = [0] * sides
+    for _ in range(count):
+        face_counts[random.randint(1, sides) - 1] += 1
+    return face_counts
+
+
+def _keep_from_counts(face_counts, keep, highest):
+    """Resolves keep-N from per-face counts, returning the kept total and a {face: count} dict."""
+    kept = {}
     total = 0
-    text_parts = [f"{component}: {original_rolls}"]
-
-    # Handle Advantage/Disadvantage
-    if 'a' in modifier:
-        if num_dice != 1: # Advantage/Disadvantage typically applies to a single roll
-            return None 
-        second_roll = roll_dice(1, num_sides)
-        original_rolls.extend(second_roll)
-        total = max(rolls[0], second_roll[0])
-        text_parts = [f"{component}: [{rolls[0]}, {second_roll[0]}] -> {total}"]
-    elif 'd' in modifier:
-        if num_dice != 1:
-            return None
-        second_roll = roll_dice(1, num_sides)
-        original_rolls.extend(second_roll)
-        total = min(rolls[0], second_roll[0])
-        text_parts = [f"{component}: [{rolls[0]}, {second_roll[0]}] -> {total}"]
-    
-    # Handle Keep Highest/Lowest
-    elif 'kh' in modifier:
-        kh_match = re.search(r'kh(\d+)', modifier)
-        if kh_match:
-            keep_count = int(kh_match.group(1))
-            rolls.sort(reverse=True)
-            kept_rolls = rolls[:keep_count]
-            total = sum(kept_rolls)
-            text_parts.append(f"-> Kept {kept_rolls} = {total}")
-    elif 'kl' in modifier:
-        kl_match = re.search(r'kl(\d+)', modifier)
-        if kl_match:
-            keep_count = int(kl_match.group(1))
-            rolls.sort()
-            kept_rolls = rolls[:keep_count]
+    remaining = keep
+    faces = range(len(face_counts), 0, -1) if highest else range(1, len(face_counts) + 1)
+    for face in faces:
+        if remaining <= 0:
+            break
+        taken = min(face_counts[face - 1], remaining)
+        if taken:
+            kept[face] = taken
+            total += taken * face
+            remaining -= taken
+    return total, kept
+
+
+def _format_face_counts(face_counts):
+    return '{' + ', '.join(f"{face}: {n}" for face, n in face_counts.items()) + '}'
+
+
+def _compile_large_pool(node):
+    """Rolls huge pools as face counts; results carry 'face_counts' instead of every die in 'rolls'."""
+    count, sides, mode, keep, source = node.count, node.sides, node.mode, node.keep, node.source
+
+    def roll_node(log):
+        face_counts = _roll_face_counts(count, sides)
+        counts = {face: n for face, n in enumerate(face_counts, start=1) if n}
+        if mode in ('kh', 'kl') and keep < count:
+            total, kept = _keep_from_counts(face_counts, keep, mode == 'kh')
+            summary = f"-> Kept {keep} {_format_face_counts(kept)} = {total}"
+        else:
+            total = sum(face * n for face, n in counts.items())
+            summary = f"-> {total}"
+        log.append({'component': source, 'rolls': [], 'face_counts': counts, 'total': total,
+                    'text': f"{source}: {count} dice {_format_face_counts(counts)} {summary}"})
+        return total
+    return roll_node
+
+
+def _compile_dice(node):
+    count, sides, mode, keep, source = node.count, node.sides, node.mode, node.keep, node.source
+
+    if count >= LARGE_POOL_THRESHOLD and sides <= count:
+        return _compile_large_pool(node)
+
+    if mode in ('adv', 'dis'):
+        pick = max if mode == 'adv' else min
+
+        def roll_node(log):
+            rolls = roll_dice(2, sides)
+            total = pick(rolls)
+            log.append({'component': source, 'rolls': rolls, 'total': total,
+                        'text': f"{source}: [{rolls[0]}, {rolls[1]}] -> {total}"})
+            return total
+    elif mode in ('kh', 'kl'):
+        select = heapq.nlargest if mode == 'kh' else heapq.nsmallest
+
+        def roll_node(log):
+            rolls = roll_dice(count, sides)
+            kept_rolls = select(keep, rolls)
             total = sum(kept_rolls)
-            text_parts.append(f"-> Kept {kept_rolls} = {total}")
+            log.append({'component': source, 'rolls': rolls, 'total': total,
+                        'text': f"{source}: {rolls} -> Kept {kept_rolls} = {total}"})
+            return total
+    else:
+        def roll_node(log):
+            rolls = roll_dice(count, sides)
+            total = sum(rolls)
+            log.append({'component': source, 'rolls': rolls, 'total': total,
+                        'text': f"{source}: {rolls} -> {total}"})
+            return total
+    return roll_node
+
+
+def _compile_node(node):
+    """Turns an AST node into a closure taking a result log and returning the rolled value."""
+    if isinstance(node, Constant):
+        value = node.value
+        return lambda log: value
+    if isinstance(node, Dice):
+        return _compile_dice(node)
+    if isinstance(node, Negate):
+        operand = _compile_node(node.operand)
+        return lambda log: -operand(log)
+    left, right = _compile_node(node.left), _compile_node(node.right)
+    if node.op == '+':
+        return lambda log: left(log) + right(log)
+    if node.op == '-':
+        return lambda log: left(log) - right(log)
+    return lambda log: left(log) * right(log)
+
+
+def _compile_total_dice(node):
+    """Compiles a Dice node into a closure that only returns the rolled total."""
+    count, sides, mode, keep = node.count, node.sides, node.mode, node.keep
+    randint = random.randint
+    if count >= LARGE_POOL_THRESHOLD and sides <= count:
+        if mode in ('kh', 'kl') and keep < count:
+            return lambda: _keep_from_counts(_roll_face_counts(count, sides), keep, mode == 'kh')[0]
+        return lambda: sum(face * n for face, n in enumerate(_roll_face_counts(count, sides), start=1))
+    if mode == 'adv':
+        return lambda: max(randint(1, sides), randint(1, sides))
+    if mode == 'dis':
+        return lambda: min(randint(1, sides), randint(1, sides))
+    if mode in ('kh', 'kl') and keep < count:
+        select = heapq.nlargest if mode == 'kh' else heapq.nsmallest
+        return lambda: sum(select(keep, [randint(1, sides) for _ in range(count)]))
+    if count == 1:
+        return lambda: randint(1, sides)
+    return lambda: sum([randint(1, sides) for _ in range(count)])
+
+
+def _compile_total(node):
+    """Turns an AST node into a closure returning just the rolled value, with no result log."""
+    if isinstance(node, Constant):
+        value = node.value
+        return lambda: value
+    if isinstance(node, Dice):
+        return _compile_total_dice(node)
+    if isinstance(node, Negate):
+        operand = _compile_total(node.operand)
+        return lambda: -operand()
+    left, right = _compile_total(node.left), _compile_total(node.right)
+    if node.op == '+':
+        return lambda: left() + right()
+    if node.op == '-':
+        return lambda: left() - right()
+    return lambda: left() * right()
+
+
+def _compile_term(sign, node):
+    """Compiles one top-level term into a closure returning its result dict."""
+    if isinstance(node, Dice):
+        roll_node = _compile_dice(node)
+        if sign > 0:
+            def roll_term():
+                log = []
+                roll_node(log)
+                return log[0]
+        else:
+            def roll_term():
+                log = []
+                roll_node(log)
+                result = log[0]
+                result['component'] = f"-{result['component']}"
+                result['total'] = -result['total']
+                result['text'] = f"-{result['text']}"
+                return result
+        return roll_term
 
-    # Standard roll
+    roll_node = _compile_node(node)
+    component = ('-' if sign < 0 else '') + _describe(node)
+
+    def roll_term():
+        log = []
+        total = sign * roll_node(log)
+        rolls = [r for entry in log for r in entry['rolls']]
+        inner = '; '.join(entry['text'] for entry in log)
+        return {'component': component, 'rolls': rolls, 'total': total,
+                'text': f"{component}: {inner} => {total}"}
+    return roll_term
+
+
+class CompiledRoll:
+    """A dice expression parsed once and ready to be rolled any number of times."""
+
+    def __init__(self, dice_string):
+        self.expression = dice_string
+        self.ast = _Parser(_tokenize(dice_string)).parse()
+
+        flat_modifier = 0
+        has_flat = False
+        self._terms = []
+        for sign, node in _split_terms(self.ast):
+            if isinstance(node, Constant):
+                flat_modifier += sign * node.value
+                has_flat = True
+            else:
+                self._terms.append(_compile_term(sign, node))
+        self.flat_modifier = flat_modifier
+        self._flat_result = None
+        if has_flat:
+            self._flat_result = {'component': str(flat_modifier), 'rolls': [flat_modifier],
+                                 'total': flat_modifier, 'text': f"{flat_modifier} = {flat_modifier}"}
+
+        self._roll_total = _compile_total(self.ast)
+
+    def roll(self):
+        """Rolls the expression and returns a list of per-term results and the grand total."""
+        results = [roll_term() for roll_term in self._terms]
+        grand_total = sum(result['total'] for result in results)
+        if self._flat_result is not None:
+            results.append(dict(self._flat_result, rolls=[self.flat_modifier]))
+            grand_total += self.flat_modifier
+        return results, grand_total
+
+    def roll_total(self):
+        """Rolls the expression and returns only the total, skipping the result breakdown."""
+        return self._roll_total()
+
+    def roll_many(self, n, seed=None, return_dice=False):
+        """Rolls the expression n times at once. See roll_many() for details."""
+        if np is None:
+            raise RuntimeError("Bulk rolling requires NumPy to be installed")
+        rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+        dice_matrices = [] if return_dice else None
+        totals = _vector_evaluate(self.ast, n, rng, dice_matrices)
+        if np.ndim(totals) == 0:
+            totals = np.full(n, totals, dtype=np.int64)
+        if return_dice:
+            return totals, dice_matrices
+        return totals
+
+    def distribution(self):
+        """Returns the exact Distribution of the expression. See distribution() for details."""
+        if np is None:
+            raise RuntimeError("Probability distributions require NumPy to be installed")
+        return _node_distribution(self.ast)
+
+    def __repr__(self):
+        return f"CompiledRoll({self.expression!r})"
+
+
+@lru_cache(maxsize=512)
+def compile(dice_string):
+    """Parses a dice string (e.g. '2 * (1d8 + 3) - 1d4') once and returns a cached CompiledRoll.
+
+    Raises ValueError if the string is not a valid dice expression.
+    """
+    return CompiledRoll(dice_string)
+# endregion
+
+
+# region Vectorized Rolling
+# Bulk rolls generate every die of a component as one (n, num_dice) integer matrix and reduce it
+# along the dice axis, so no per-roll result dicts or text are ever built.
+
+def _vector_dice(node, n, rng, dice_matrices):
+    if node.mode in ('adv', 'dis'):
+        rolls = rng.integers(1, node.sides + 1, size=(n, 2), dtype=np.int64)
+        totals = rolls.max(axis=1) if node.mode == 'adv' else rolls.min(axis=1)
     else:
-        total = sum(rolls)
-        text_parts.append(f"-> {total}")
+        rolls = rng.integers(1, node.sides + 1, size=(n, node.count), dtype=np.int64)
+        keep, count = node.keep, node.count
+        if node.mode == 'sum' or keep >= count:
+            totals = rolls.sum(axis=1)
+        elif keep <= 0:
+            totals = np.zeros(n, dtype=np.int64)
+        elif node.mode == 'kh':
+            # Only the boundary element needs to land in place, the rest just have to be on the right side
+            totals = np.partition(rolls, count - keep, axis=1)[:, count - keep:].sum(axis=1)
+        else:
+            totals = np.partition(rolls, keep - 1, axis=1)[:, :keep].sum(axis=1)
+    if dice_matrices is not None:
+        dice_matrices.append((node.source, rolls))
+    return totals
+
+
+def _vector_evaluate(node, n, rng, dice_matrices):
+    """Evaluates an AST node for n independent rolls, returning an int64 array or a scalar."""
+    if isinstance(node, Constant):
+        return node.value
+    if isinstance(node, Dice):
+        return _vector_dice(node, n, rng, dice_matrices)
+    if isinstance(node, Negate):
+        return -_vector_evaluate(node.operand, n, rng, dice_matrices)
+    left = _vector_evaluate(node.left, n, rng, dice_matrices)
+    right = _vector_evaluate(node.right, n, rng, dice_matrices)
+    return _apply(node.op, left, right)
+
+
+def roll_many(dice_string, n, seed=None, return_dice=False):
+    """Rolls a dice string n times using NumPy and returns an array of the n totals.
+
+    seed may be an int or a numpy Generator for reproducible batches. With return_dice=True a
+    (totals, dice_matrices) pair is returned, where dice_matrices lists a (component, rolls) pair
+    for each dice component and rolls is its (n, num_dice) matrix of raw dice.
+    Raises ValueError for invalid dice strings and RuntimeError if NumPy is not installed.
+    """
+    return compile(dice_string).roll_many(n, seed=seed, return_dice=return_dice)
+# endregion
+
+
+# region Exact Distributions
+# Distributions are dense probability arrays over a contiguous integer support starting at
+# `offset`. Dice pieces are memoized by (count, sides, mode, keep), so an expression like
+# '20d6 + 8d8' reuses 10d6, 5d6, 4d8, ... from the binary-exponentiation cache.
+
+class Distribution:
+    """The exact probability mass function of a dice expression."""
+
+    def __init__(self, offset, probs):
+        probs = np.asarray(probs, dtype=np.float64)
+        nonzero = np.flatnonzero(probs > 0)
+        if len(nonzero):
+            offset += int(nonzero[0])
+            probs = probs[nonzero[0]:nonzero[-1] + 1]
+        probs.flags.writeable = False
+        self.offset = offset
+        self.probs = probs
+
+    @property
+    def values(self):
+        return np.arange(self.offset, self.offset + len(self.probs))
+
+    @property
+    def minimum(self):
+        return self.offset
+
+    @property
+    def maximum(self):
+        return self.offset + len(self.probs) - 1
+
+    @property
+    def mean(self):
+        return float(np.dot(self.values, self.probs))
+
+    @property
+    def variance(self):
+        deviations = self.values - self.mean
+        return float(np.dot(deviations * deviations, self.probs))
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
 
-    return {
-        'component': component,
-        'rolls': original_rolls,
-        'total': total,
-        'text': ' '.join(text_parts)
-    }
+    def pmf(self):
+        """Returns a {value: probability} dict for every reachable value."""
+        return {self.offset + i: float(p) for i, p in enumerate(self.probs) if p > 0}
+
+    def cdf(self):
+        """Returns the cumulative probabilities aligned with `values`."""
+        return np.cumsum(self.probs)
+
+    def percentile(self, q):
+        """Returns the smallest value whose cumulative probability reaches q percent."""
+        index = int(np.searchsorted(self.cdf(), q / 100.0 - 1e-12))
+        return self.offset + min(index, len(self.probs) - 1)
+
+    def probability_at_least(self, value):
+        index = max(value - self.offset, 0)
+        return float(self.probs[index:].sum())
+
+    def probability_at_most(self, value):
+        index = value - self.offset + 1
+        return float(self.probs[:max(index, 0)].sum())
+
+    def __add__(self, other):
+        return Distribution(self.offset + other.offset, _convolve(self.probs, other.probs))
+
+    def __neg__(self):
+        return Distribution(-self.maximum, self.probs[::-1])
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def scaled(self, factor):
+        """Returns the distribution of this value multiplied by a constant."""
+        if factor == 0:
+            return _constant_distribution(0)
+        if factor < 0:
+            return (-self).scaled(-factor)
+        probs = np.zeros((len(self.probs) - 1) * factor + 1)
+        probs[::factor] = self.probs
+        return Distribution(self.offset * factor, probs)
+
+    def __mul__(self, other):
+        if len(other.probs) == 1:
+            return self.scaled(other.offset)
+        if len(self.probs) == 1:
+            return other.scaled(self.offset)
+        products = np.multiply.outer(self.values, other.values).ravel()
+        weights = np.multiply.outer(self.probs, other.probs).ravel()
+        low = int(products.min())
+        probs = np.zeros(int(products.max()) - low + 1)
+        np.add.at(probs, products - low, weights)
+        return Distribution(low, probs)
+
+    def __repr__(self):
+        return f"Distribution(min={self.minimum}, max={self.maximum}, mean={self.mean:.3f})"
+
+
+# Convolutions whose shorter side is at least this long go through the FFT instead of np.convolve
+FFT_THRESHOLD = 256
+
+
+def _convolve(a, b):
+    """Convolves two probability arrays: directly for short ones, by FFT in O(n log n) for long ones."""
+    if min(len(a), len(b)) < FFT_THRESHOLD:
+        return np.convolve(a, b)
+    size = len(a) + len(b) - 1
+    probs = np.fft.irfft(np.fft.rfft(a, size) * np.fft.rfft(b, size), size)
+    # Rounding leaves values around 1e-17 where the exact result is tiny or zero
+    return np.clip(probs, 0.0, None)
+
+
+def _constant_distribution(value):
+    return Distribution(value, [1.0])
+
+
+@lru_cache(maxsize=256)
+def _sum_distribution(count, sides):
+    """Distribution of the sum of `count` dice, built by repeated squaring; large supports convolve by FFT."""
+    if count == 0:
+        return _constant_distribution(0)
+    if count == 1:
+        return Distribution(1, np.full(sides, 1.0 / sides))
+    half = _sum_distribution(count // 2, sides)
+    result = half + half
+    if count % 2:
+        result = result + _sum_distribution(1, sides)
+    return result
+
+
+def _binomial_pmf(n, q, upto):
+    """P(X = c) for c in range(upto), X ~ Binomial(n, q), computed in log space so huge n cannot overflow."""
+    if q >= 1.0:
+        return [1.0 if c == n else 0.0 for c in range(upto)]
+    log_q, log_rest, log_n = math.log(q), math.log1p(-q), math.lgamma(n + 1)
+    return [math.exp(log_n - math.lgamma(c + 1) - math.lgamma(n - c + 1) + c * log_q + (n - c) * log_rest)
+            if c <= n else 0.0 for c in range(upto)]
+
+
+@lru_cache(maxsize=256)
+def _keep_distribution(count, sides, keep, highest):
+    """Distribution of the sum of the `keep` highest (or lowest) of `count` dice, for keep < count.
+
+    Faces are visited from the kept end of the range. dp[used, total] holds the probability that
+    `used` (fewer than keep) dice landed on the faces seen so far with `total` points among them;
+    each other die then shows the current face with probability 1 / faces left, a binomial draw.
+    Once `keep` dice are placed the kept total is final and that mass moves to `done`, so the
+    work is O(sides * keep^2) row updates whatever the number of dice.
+    """
+    width = keep * sides + 1
+    dp = np.zeros((keep, width))
+    dp[0, 0] = 1.0
+    done = np.zeros(width)
+    faces = range(sides, 0, -1) if highest else range(1, sides + 1)
+    for index, face in enumerate(faces):
+        on_face = 1.0 / (sides - index)
+        new_dp = np.zeros_like(dp)
+        for used in range(keep):
+            row = dp[used]
+            if not row.any():
+                continue
+            needed = keep - used
+            pmf = _binomial_pmf(count - used, on_face, needed)
+            for c, weight in enumerate(pmf):
+                if weight:
+                    shift = c * face
+                    new_dp[used + c, shift:] += row[:width - shift] * weight
+            # At least `needed` more dice on this face: the lowest (or highest) of them fill the rest
+            tail = max(1.0 - math.fsum(pmf), 0.0)
+            if tail:
+                shift = needed * face
+                done[shift:] += row[:width - shift] * tail
+        dp = new_dp
+    return Distribution(0, done)
+
+
+@lru_cache(maxsize=256)
+def _dice_distribution(count, sides, mode, keep):
+    if mode in ('adv', 'dis'):
+        # P(max <= x) = F(x)^2 and P(min >= x) = (1 - F(x - 1))^2
+        faces = np.arange(0, sides + 1) / sides
+        if mode == 'adv':
+            cdf = faces ** 2
+        else:
+            cdf = 1.0 - (1.0 - faces) ** 2
+        return Distribution(1, np.diff(cdf))
+    if mode == 'sum' or keep >= count:
+        return _sum_distribution(count, sides)
+    if keep <= 0:
+        return _constant_distribution(0)
+    return _keep_distribution(count, sides, keep, mode == 'kh')
+
+
+def _node_distribution(node):
+    if isinstance(node, Constant):
+        return _constant_distribution(node.value)
+    if isinstance(node, Dice):
+        return _dice_distribution(node.count, node.sides, node.mode, node.keep)
+    if isinstance(node, Negate):
+        return -_node_distribution(node.operand)
+    left, right = _node_distribution(node.left), _node_distribution(node.right)
+    if node.op == '+':
+        return left + right
+    if node.op == '-':
+        return left - right
+    return left * right
+
+
+@lru_cache(maxsize=256)
+def distribution(dice_string):
+    """Computes the exact probability distribution of a dice string, without sampling.
+
+    The returned Distribution exposes pmf(), mean, variance, std, percentile(q) and
+    probability_at_least(x), e.g. distribution('1d20 + 5').probability_at_least(15) for hit odds.
+    Raises ValueError for invalid dice strings and RuntimeError if NumPy is not installed.
+    """
+    return compile(dice_string).distribution()
+# endregion
 
 
 def roll(dice_string):
-    """Rolls a complex dice string and returns a list of results and the grand total."""
-    components = dice_string.split('+')
-    results = []
-    grand_total = 0
-
-    for comp in components:
-        result = parse_and_roll(comp)
-        if result:
-            results.append(result)
-            grand_total += result['total']
-    
-    return results, grand_total
+    """Rolls a complex dice string and returns a list of results and the grand total.
+
+    A trailing damage type, as in '1d8 piercing', is ignored; invalid strings roll nothing.
+    """
+    try:
+        compiled = compile(split_damage_string(dice_string)[0])
+    except ValueError:
+        return [], 0
+    return compiled.roll()
@@ -0,0 +1,163 @@
+import json
+import time
+from collections import deque
+
+from utils.character_model import Sprite
+from utils.edit_journal import diff_sheets
+
+# Default upper bound for the memory held by undo and redo history
+MEMORY_LIMIT = 4 * 1024 * 1024
+# Changes to the same fields less than this many seconds apart are undone as one step
+MERGE_WINDOW = 1.0
+SPRITE_PATH = ("sprite",)
+MISSING = object()  # the value of a key that is not in the sheet
+
+
+def sheet_changes(old, new):
+    """Returns [(path, old value, new value)] for the fields that differ between two sheet dicts.
+
+    Paths are tuples as in diff_sheets(); a key that is absent on one side has the value MISSING.
+    """
+    changes = []
+    for edit in diff_sheets(old, new):
+        path = tuple(edit["path"])
+        changes.append((path, lookup(old, path), MISSING if edit.get("delete") else edit["value"]))
+    return changes
+
+
+def lookup(sheet, path):
+    value = sheet
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return MISSING
+        value = value[key]
+    return value
+
+
+def apply_changes(sheet, changes):
+    """Sets the (path, value) pairs in a sheet dict in place, deleting keys whose value is MISSING."""
+    for path, value in changes:
+        *parents, key = path
+        target = sheet
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        if value is MISSING:
+            target.pop(key, None)
+        else:
+            target[key] = value
+    return sheet
+
+
+def _value_size(value):
+    if value is MISSING or value is None:
+        return 0
+    if isinstance(value, Sprite):
+        # Only a reference is kept, but it keeps the image bytes alive
+        return len(value.data) if value.is_loaded else 0
+    return len(json.dumps(value, default=str))
+
+
+class EditCommand:
+    """One undoable step: the old and new value of every field it changed."""
+    __slots__ = ('changes', 'time', 'size')
+
+    def __init__(self, changes, now):
+        self.changes = {path: [old, new] for path, old, new in changes}
+        self.time = now
+        self.size = self._measure()
+
+    def _measure(self):
+        return sum(len(repr(path)) + _value_size(old) + _value_size(new) for path, (old, new) in self.changes.items())
+
+    def merge(self, changes, now):
+        """Folds later changes of the same fields in; returns False if the step is now a no-op."""
+        for path, _, new in changes:
+            self.changes[path][1] = new
+        self.time = now
+        self.size = self._measure()
+        return any(old is not new and old != new for old, new in self.changes.values())
+
+
+class EditHistory:
+    """Undo and redo history of a character sheet, stored as field-level changes.
+
+    Whole sheets are never kept, only the old and new value of each changed field; the sprite
+    is recorded under SPRITE_PATH by reference. Changes to the same fields within MERGE_WINDOW
+    seconds merge into one step, so spinning a value or typing a word is undone at once. When
+    the history holds more than memory_limit bytes the oldest steps are dropped.
+    """
+
+    def __init__(self, memory_limit=MEMORY_LIMIT, merge_window=MERGE_WINDOW):
+        self._memory_limit = memory_limit
+        self.merge_window = merge_window
+        self._undo = deque()
+        self._redo = []
+        self._merge_allowed = False
+        self.memory_used = 0
+
+    @property
+    def memory_limit(self):
+        return self._memory_limit
+
+    @memory_limit.setter
+    def memory_limit(self, limit):
+        self._memory_limit = limit
+        self._evict()
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def __len__(self):
+        return len(self._undo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._merge_allowed = False
+        self.memory_used = 0
+
+    def record(self, changes, now=None):
+        """Adds [(path, old, new)] as a new step, or merges it into the last one; clears the redo history."""
+        if not changes:
+            return
+        now = time.monotonic() if now is None else now
+        for command in self._redo:
+            self.memory_used -= command.size
+        self._redo.clear()
+
+        last = self._undo[-1] if self._undo else None
+        if (self._merge_allowed and last is not None and now - last.time <= self.merge_window
+                and {path for path, _, _ in changes} == last.changes.keys()):
+            self.memory_used -= last.size
+            if last.merge(changes, now):
+                self.memory_used += last.size
+            else:
+                self._undo.pop()
+        else:
+            command = EditCommand(changes, now)
+            self._undo.append(command)
+            self.memory_used += command.size
+        self._merge_allowed = True
+        self._evict()
+
+    def _evict(self):
+        # The newest step is always kept, so the last change can be undone however big it is
+        while self.memory_used > self._memory_limit and len(self._undo) > 1:
+            self.memory_used -= self._undo.popleft().size
+
+    def undo(self):
+        """Steps back; returns the [(path, value)] pairs that restore the previous state."""
+        command = self._undo.pop()
+        self._redo.append(command)
+        self._merge_allowed = False
+        return [(path, old) for path, (old, _) in command.changes.items()]
+
+    def redo(self):
+        """Steps forward again; returns the [(path, value)] pairs to apply."""
+        command = self._redo.pop()
+        self._undo.append(command)
+        self._merge_allowed = False
+        return [(path, new) for path, (_, new) in command.changes.items()]
@@ -0,0 +1,140 @@
+import os
+import json
+
+from utils.character_file import load_character, write_character_file
+from utils.character_model import Character
+
+JOURNAL_SUFFIX = ".journal"
+SNAPSHOT_SUFFIX = ".autosave"
+# Number of journal records after which the journal is folded into a fresh snapshot
+COMPACT_EVERY = 200
+
+
+def diff_sheets(old, new):
+    """Returns the field-level edits turning sheet dict old into new.
+
+    Edits are {"path": [...], "value": ...} or {"path": [...], "delete": true}. Nested objects
+    such as ability_scores or roleplay are compared key by key, everything else as a whole.
+    """
+    edits = []
+    for key in old.keys() | new.keys():
+        if key not in new:
+            edits.append({"path": [key], "delete": True})
+        elif key not in old:
+            edits.append({"path": [key], "value": new[key]})
+        elif old[key] != new[key]:
+            if isinstance(old[key], dict) and isinstance(new[key], dict):
+                for sub_key in old[key].keys() | new[key].keys():
+                    if sub_key not in new[key]:
+                        edits.append({"path": [key, sub_key], "delete": True})
+                    elif old[key].get(sub_key) != new[key][sub_key] or sub_key not in old[key]:
+                        edits.append({"path": [key, sub_key], "value": new[key][sub_key]})
+            else:
+                edits.append({"path": [key], "value": new[key]})
+    return edits
+
+
+def apply_edits(sheet, edits):
+    """Applies edits from diff_sheets() to a sheet dict in place and returns it."""
+    for edit in edits:
+        *parents, key = edit["path"]
+        target = sheet
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        if edit.get("delete"):
+            target.pop(key, None)
+        else:
+            target[key] = edit["value"]
+    return sheet
+
+
+class CharacterRecovery:
+    """Crash recovery files kept next to a character file while it has unsaved edits.
+
+    Edits are appended to <file>.journal as one JSON line each and flushed to disk, which is
+    cheap enough to do after every change. Every COMPACT_EVERY records, and whenever the sprite
+    changes, the journal is folded into a full <file>.autosave snapshot written atomically.
+    The character file itself is only ever written by an explicit save, which discards both.
+    Not thread-safe: use it from one thread at a time.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.snapshot_path = path + SNAPSHOT_SUFFIX
+        self._last_sheet = None
+        self._last_sprite = None
+        self._records = 0
+
+    def has_recovery(self):
+        return os.path.exists(self.journal_path) or os.path.exists(self.snapshot_path)
+
+    def start(self, sheet, sprite):
+        """Sets the state the next recorded edits are relative to, e.g. right after a load or save."""
+        self._last_sheet = sheet
+        self._last_sprite = sprite
+
+    def record(self, sheet, sprite):
+        """Journals how sheet differs from the last recorded state; returns the number of edits."""
+        if self._last_sheet is None or sprite is not self._last_sprite:
+            # Sprites are too big for the journal, so a new one goes straight into a snapshot
+            self.compact(sheet, sprite)
+            return 1
+        edits = diff_sheets(self._last_sheet, sheet)
+        if not edits:
+            return 0
+        with open(self.journal_path, 'a') as f:
+            for edit in edits:
+                f.write(json.dumps(edit, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._last_sheet = sheet
+        self._records += len(edits)
+        if self._records >= COMPACT_EVERY:
+            self.compact(sheet, sprite)
+        return len(edits)
+
+    def compact(self, sheet, sprite):
+        """Writes the whole sheet as the snapshot and starts an empty journal."""
+        write_character_file(self.snapshot_path, sheet, sprite)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._last_sheet = sheet
+        self._last_sprite = sprite
+        self._records = 0
+
+    def recover(self):
+        """Rebuilds the character from the snapshot, or the saved file, plus the journal."""
+        if os.path.exists(self.snapshot_path):
+            character = load_character(self.snapshot_path)
+        elif os.path.exists(self.path):
+            character = load_character(self.path)
+        else:
+            character = Character()
+        sprite = character.sprite
+        if sprite is not None:
+            # Read it now, the snapshot it lazily comes from is removed once the edits are saved
+            sprite.data
+        sheet = character.to_dict(include_sprite=False)
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        edit = json.loads(line)
+                    except ValueError:
+                        # A crash can cut the last line short; everything before it is intact
+                        break
+                    apply_edits(sheet, [edit])
+        character = Character.from_dict(sheet)
+        character.sprite = sprite
+        return character
+
+    def discard(self):
+        """Removes the recovery files, e.g. after a save or when the edits are thrown away."""
+        for path in (self.journal_path, self.snapshot_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._last_sheet = None
+        self._last_sprite = None
+        self._records = 0
+
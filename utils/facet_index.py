@@ -0,0 +1,144 @@
+import re
+import bisect
+
+# Facets indexed for every item; "property" is taken from the "properties" list
+FACETS = ("slot", "type", "category", "property")
+NUMERIC_FIELDS = ("cost", "weight")
+
+_COIN_VALUES = {"cp": 0.01, "sp": 0.1, "ep": 0.5, "gp": 1.0, "pp": 10.0}
+_AMOUNT_RE = re.compile(r'^\s*([\d.]+)\s*([a-z]*)')
+
+
+def property_key(prop):
+    """Normalizes an item property, e.g. 'ammunition (range 150/600)' -> 'ammunition'."""
+    return str(prop).split("(", 1)[0].strip().lower()
+
+
+def numeric_value(value):
+    """Reads a number from an item field; cost strings like '15 gp' are converted to gold."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _AMOUNT_RE.match(value.lower())
+        if match:
+            try:
+                amount = float(match.group(1))
+            except ValueError:
+                return None
+            return amount * _COIN_VALUES.get(match.group(2), 1.0)
+    return None
+
+
+def facet_values(item_data, facet):
+    """Returns the set of values an item has for a facet."""
+    if facet == "property":
+        return {property_key(prop) for prop in item_data.get("properties", [])}
+    value = item_data.get(facet)
+    if value is None:
+        return set()
+    if isinstance(value, list):
+        return {str(v) for v in value}
+    return {str(value)}
+
+
+class FacetIndex:
+    """Precomputed facet and numeric range indexes over item attributes.
+
+    Each facet maps a value to the set of item ids having it (slot -> ids, type -> ids, ...),
+    and every numeric field keeps a (value, id) list that is sorted on first query after a
+    change and then answered by bisection.
+    """
+
+    def __init__(self):
+        self._facets = {facet: {} for facet in FACETS}
+        self._numeric = {field: [] for field in NUMERIC_FIELDS}
+        self._unsorted = set()
+        self._item_values = {}  # item_id -> ({facet: values}, {field: number}), used for removal
+        self._query_cache = {}
+
+    def add(self, item_id, item_data):
+        self._query_cache.clear()
+        if item_id in self._item_values:
+            self.remove(item_id)
+        values = {facet: facet_values(item_data, facet) for facet in FACETS}
+        numbers = {}
+        for facet, facet_set in values.items():
+            for value in facet_set:
+                self._facets[facet].setdefault(value, set()).add(item_id)
+        for field in NUMERIC_FIELDS:
+            number = numeric_value(item_data.get(field))
+            if number is not None:
+                numbers[field] = number
+                self._numeric[field].append((number, item_id))
+                self._unsorted.add(field)
+        self._item_values[item_id] = (values, numbers)
+
+    def remove(self, item_id):
+        self._query_cache.clear()
+        entry = self._item_values.pop(item_id, None)
+        if entry is None:
+            return
+        values, numbers = entry
+        for facet, facet_set in values.items():
+            for value in facet_set:
+                ids = self._facets[facet][value]
+                ids.discard(item_id)
+                if not ids:
+                    del self._facets[facet][value]
+        for field, number in numbers.items():
+            self._numeric[field].remove((number, item_id))
+
+    def ids(self, facet, value):
+        """Returns the ids of all items with the given facet value. Treat the result as read-only."""
+        return self._facets[facet].get(value, frozenset())
+
+    def values(self, facet):
+        """Returns {value: item count} for a facet, e.g. to build filter chips."""
+        return {value: len(ids) for value, ids in self._facets[facet].items()}
+
+    def range(self, field, low=None, high=None):
+        """Returns the ids of items whose numeric field lies within [low, high]."""
+        column = self._numeric[field]
+        if field in self._unsorted:
+            column.sort()
+            self._unsorted.discard(field)
+        start = 0 if low is None else bisect.bisect_left(column, (low,))
+        end = len(column) if high is None else bisect.bisect_right(column, (high, chr(0x10ffff)))
+        return {item_id for _, item_id in column[start:end]}
+
+    def query(self, filters=None, ranges=None):
+        """Returns the ids matching every filter.
+
+        filters maps a facet to a value, or to a collection of values any of which may match,
+        e.g. {"type": "weapon", "property": "two-handed", "slot": "right_hand"}.
+        ranges maps a numeric field to a (low, high) pair, either end may be None.
+        Results are memoized until the index changes; treat them as read-only.
+        """
+        key = (_freeze(filters), _freeze(ranges))
+        result = self._query_cache.get(key)
+        if result is None:
+            result = self._query_cache[key] = self._run_query(filters, ranges)
+        return result
+
+    def _run_query(self, filters, ranges):
+        candidate_sets = []
+        for facet, wanted in (filters or {}).items():
+            if isinstance(wanted, str):
+                candidate_sets.append(self.ids(facet, wanted))
+            else:
+                candidate_sets.append(set().union(*(self.ids(facet, value) for value in wanted)))
+        for field, (low, high) in (ranges or {}).items():
+            candidate_sets.append(self.range(field, low, high))
+        if not candidate_sets:
+            return frozenset(self._item_values)
+        candidate_sets.sort(key=len)
+        return frozenset(candidate_sets[0].intersection(*candidate_sets[1:]))
+
+
+def _freeze(mapping):
+    if not mapping:
+        return ()
+    return tuple(sorted((key, value if isinstance(value, (str, tuple)) else tuple(sorted(value)))
+                        for key, value in mapping.items()))
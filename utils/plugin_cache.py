@@ -0,0 +1,120 @@
+import os
+import json
+import pickle
+import hashlib
+import threading
+
+from utils.plugin_registry import (ENGINE_VERSION, entry_id_for, iter_content_files, load_archived_category,
+                                   unreadable_file_issue)
+
+CACHE_PATH = 'resources/data/plugin_cache.pickle'
+# Bump whenever the layout of the cache file changes
+CACHE_FORMAT = 2
+
+
+class PluginContentCache:
+    """On-disk cache of parsed plugin content, stored as a single pickle (protocol 5) file.
+
+    Every content file is recorded with its mtime, size and SHA-1 digest. Files whose mtime and
+    size are unchanged are served straight from the cache; files that were touched but not
+    changed are recognised by their digest, and only genuinely changed files are re-parsed.
+    A corrupt cache, or one written by another engine version, is discarded and rebuilt.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._plugins = self._read()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, 'rb') as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception:
+            # A truncated or foreign file is not worth recovering; it will be rewritten
+            return {}
+        if (not isinstance(payload, dict) or payload.get("format") != CACHE_FORMAT
+                or payload.get("engine_version") != ENGINE_VERSION):
+            return {}
+        return payload.get("plugins", {})
+
+    def load_category(self, plugin, category, issues=None):
+        """Returns {rel_path: (entry_id, data)} for one category of a plugin, parsing only changed files.
+
+        Unreadable files are handled as in plugin_registry.load_category(); they are not cached.
+        """
+        if plugin.archive is not None:
+            # Packed plugins are already a single mapped file, decoding from it is as cheap as the cache
+            return load_archived_category(plugin, category, issues)
+        with self._lock:
+            cached = self._plugins.get(plugin.id)
+            if cached is None or cached.get("meta") != plugin.meta:
+                cached = {"meta": plugin.meta, "categories": {}}
+                self._plugins[plugin.id] = cached
+                self._dirty = True
+            cached_files = cached["categories"].get(category, {})
+
+        files = {}
+        entries = {}
+        changed = False
+        for rel_path, full_path in iter_content_files(plugin, category):
+            record = cached_files.get(rel_path)
+            try:
+                stat = os.stat(full_path)
+                if record is None or record[0] != stat.st_mtime_ns or record[1] != stat.st_size:
+                    record = self._refresh_record(category, rel_path, full_path, stat, record)
+                    changed = True
+            except (OSError, ValueError) as e:
+                if issues is None:
+                    raise
+                issues.append(unreadable_file_issue(full_path, e))
+                changed = True
+                continue
+            files[rel_path] = record
+            entries[rel_path] = (record[3], record[4])
+
+        if changed or files.keys() != cached_files.keys():
+            with self._lock:
+                cached["categories"][category] = files
+                self._dirty = True
+        return entries
+
+    @staticmethod
+    def _refresh_record(category, rel_path, full_path, stat, record):
+        """Builds a (mtime_ns, size, digest, entry_id, data) record, re-parsing only on new content."""
+        with open(full_path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        if record is not None and record[2] == digest:
+            return (stat.st_mtime_ns, stat.st_size, digest, record[3], record[4])
+        data = json.loads(raw)
+        return (stat.st_mtime_ns, stat.st_size, digest, entry_id_for(category, rel_path, data), data)
+
+    def save(self, plugins=None):
+        """Writes the cache back atomically if anything changed, dropping uninstalled plugins."""
+        with self._lock:
+            if plugins is not None:
+                for plugin_id in list(self._plugins):
+                    if plugin_id not in plugins:
+                        del self._plugins[plugin_id]
+                        self._dirty = True
+            if not self._dirty:
+                return
+            payload = {"format": CACHE_FORMAT, "engine_version": ENGINE_VERSION, "plugins": self._plugins}
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                pickle.dump(payload, f, protocol=5)
+            os.replace(temp_path, self.path)
+            self._dirty = False
+
+    def clear(self):
+        """Forgets all cached content and removes the cache file."""
+        with self._lock:
+            self._plugins = {}
+            self._dirty = False
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,696 @@
+import os
+import json
+import heapq
+import base64
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.class_progression import compile_progression
+from utils.content_overlay import is_patch, resolve_layers
+from utils.facet_index import FacetIndex
+from utils.plugin_schema import ValidationIssue, validate
+from utils.ravenpak import EXTENSION as ARCHIVE_EXTENSION, RavenPak, RavenPakError
+from utils.search_index import SearchIndex
+
+PLUGINS_DIR = "plugins"
+ENGINE_VERSION = "1.0"
+CATEGORIES = ("classes", "items", "spells", "creatures", "features", "subclasses")
+
+
+class PluginLoadError(Exception):
+    """Raised for plugins that cannot be loaded, e.g. because of missing or cyclic dependencies."""
+
+
+class Plugin:
+    """A plugin folder, or a packed .ravenpak archive, and its parsed meta.json manifest."""
+
+    def __init__(self, plugin_id, path, meta, archive=None):
+        self.id = plugin_id
+        self.path = path
+        self.meta = meta
+        self.archive = archive
+
+    @property
+    def load_order(self):
+        return self.meta.get("load_order", 0)
+
+    @property
+    def dependencies(self):
+        return self.meta.get("dependencies", [])
+
+    def __repr__(self):
+        return f"Plugin({self.id!r})"
+
+
+def discover_plugins(plugins_dir=PLUGINS_DIR, errors=None):
+    """Finds every plugin folder with a meta.json manifest, and every .ravenpak archive.
+
+    Returns them sorted by load order. Archives that cannot be opened and folders whose
+    meta.json cannot be read are reported in errors as PluginLoadErrors when a list is given,
+    and raise otherwise.
+    """
+    plugins = []
+    if not os.path.isdir(plugins_dir):
+        return plugins
+    for folder in sorted(os.listdir(plugins_dir)):
+        path = os.path.join(plugins_dir, folder)
+        if folder.endswith(ARCHIVE_EXTENSION) and os.path.isfile(path):
+            try:
+                archive = RavenPak(path)
+            except RavenPakError as e:
+                if errors is None:
+                    raise
+                errors.append(PluginLoadError(str(e)))
+                continue
+            plugin_id = archive.meta.get("id", folder[:-len(ARCHIVE_EXTENSION)])
+            plugins.append(Plugin(plugin_id, path, archive.meta, archive))
+            continue
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.isfile(meta_path):
+            continue
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            if not isinstance(meta, dict):
+                raise ValueError("expected a JSON object")
+        except (OSError, ValueError) as e:
+            if errors is None:
+                raise
+            errors.append(PluginLoadError(f"Plugin folder '{folder}' has an unreadable meta.json: {e}"))
+            continue
+        plugins.append(Plugin(meta.get("id", folder), path, meta))
+    plugins.sort(key=lambda plugin: (plugin.load_order, plugin.id))
+    return plugins
+
+
+def resolve_load_order(plugins):
+    """Orders plugins so every plugin comes after its dependencies.
+
+    Among plugins whose dependencies are satisfied, lower load_order (then id) goes first.
+    Returns (ordered_plugins, errors); plugins with missing dependencies, dependencies on a
+    skipped plugin, or that are part of a dependency cycle are left out and reported in errors.
+    When two plugins share an id, e.g. a folder and a .ravenpak of the same plugin, the one
+    that comes first in plugins is used and the other is reported.
+    """
+    by_id = {}
+    errors = []
+    unique = []
+    for plugin in plugins:
+        first = by_id.setdefault(plugin.id, plugin)
+        if first is plugin:
+            unique.append(plugin)
+        else:
+            errors.append(PluginLoadError(f"Plugin '{plugin.id}' is provided by both {first.path} and "
+                                          f"{plugin.path}; {plugin.path} was ignored"))
+    plugins = unique
+    skipped = set()
+
+    # Drop plugins with missing dependencies, and transitively everything depending on them
+    changed = True
+    while changed:
+        changed = False
+        for plugin in plugins:
+            if plugin.id in skipped:
+                continue
+            missing = [dep for dep in plugin.dependencies if dep not in by_id or dep in skipped]
+            if missing:
+                skipped.add(plugin.id)
+                errors.append(PluginLoadError(f"Plugin '{plugin.id}' is missing dependencies: {', '.join(missing)}"))
+                changed = True
+
+    remaining = {plugin.id: set(plugin.dependencies) for plugin in plugins if plugin.id not in skipped}
+    dependents = {plugin_id: [] for plugin_id in remaining}
+    for plugin_id, deps in remaining.items():
+        for dep in deps:
+            dependents[dep].append(plugin_id)
+
+    ready = [(by_id[pid].load_order, pid) for pid, deps in remaining.items() if not deps]
+    heapq.heapify(ready)
+    ordered = []
+    while ready:
+        _, plugin_id = heapq.heappop(ready)
+        ordered.append(by_id[plugin_id])
+        for dependent in dependents[plugin_id]:
+            remaining[dependent].discard(plugin_id)
+            if not remaining[dependent]:
+                heapq.heappush(ready, (by_id[dependent].load_order, dependent))
+
+    if len(ordered) < len(remaining):
+        cyclic = sorted(pid for pid in remaining if by_id[pid] not in ordered)
+        errors.append(PluginLoadError(f"Dependency cycle between plugins: {', '.join(cyclic)}"))
+    return ordered, errors
+
+
+def entry_id_for(category, rel_path, data):
+    """Works out the id of a content entry from its file path and data.
+
+    Features and subclasses are referenced by path (e.g. "global/asi", "fighter/champion"),
+    everything else by its "id" field, falling back to the file name.
+    """
+    stem = os.path.splitext(rel_path)[0].replace(os.sep, "/")
+    if category in ("features", "subclasses"):
+        return stem
+    if isinstance(data, dict) and data.get("id"):
+        return data["id"]
+    return stem.rsplit("/", 1)[-1]
+
+
+def iter_content_files(plugin, category):
+    """Yields (rel_path, full_path) for every JSON file in one category folder of a plugin."""
+    category_dir = os.path.join(plugin.path, category)
+    for root, _, files in os.walk(category_dir):
+        for filename in sorted(files):
+            if filename.endswith(".json"):
+                full_path = os.path.join(root, filename)
+                yield os.path.relpath(full_path, category_dir), full_path
+
+
+def load_content_file(category, rel_path, full_path):
+    """Parses one content file and returns (entry_id, data)."""
+    with open(full_path, 'r') as f:
+        data = json.load(f)
+    return entry_id_for(category, rel_path, data), data
+
+
+def unreadable_file_issue(file, error):
+    """The ValidationIssue reported for a content file that cannot be read or parsed."""
+    return ValidationIssue(file, "$", f"cannot be read: {error}")
+
+
+def load_category(plugin, category, issues=None):
+    """Parses every JSON file of one category in a plugin and returns {rel_path: (entry_id, data)}.
+
+    Files that cannot be read are left out and, when issues is a list, reported in it as
+    ValidationIssues; otherwise the error is raised.
+    """
+    if plugin.archive is not None:
+        return load_archived_category(plugin, category, issues)
+    files = {}
+    for rel_path, full_path in iter_content_files(plugin, category):
+        try:
+            files[rel_path] = load_content_file(category, rel_path, full_path)
+        except (OSError, ValueError) as e:
+            if issues is None:
+                raise
+            issues.append(unreadable_file_issue(full_path, e))
+    return files
+
+
+def load_archived_category(plugin, category, issues=None):
+    """Decodes one category of a packed plugin; other categories and images stay unread.
+
+    Undecodable files are handled as in load_category().
+    """
+    archive = plugin.archive
+    prefix = category + "/"
+    files = {}
+    for name in archive.names(prefix):
+        if not name.endswith(".json"):
+            continue
+        try:
+            files[name[len(prefix):].replace("/", os.sep)] = (archive.entry_id(name), archive.read_json(name))
+        except ValueError as e:
+            if issues is None:
+                raise
+            issues.append(unreadable_file_issue(os.path.join(plugin.path, name), e))
+    return files
+
+
+def _item_search_fields(data):
+    properties = data.get("properties", [])
+    if isinstance(properties, list):
+        properties = " ".join(str(prop) for prop in properties)
+    return {
+        "name": data.get("name", ""),
+        "type": data.get("type", ""),
+        "properties": str(properties),
+        "description": data.get("description", ""),
+    }
+
+
+class LazyCategory:
+    """One content category merged across all plugins, loaded the first time it is accessed.
+
+    Plugins are parsed concurrently on a thread pool and layered in dependency order: content
+    from a later plugin replaces content with the same id from an earlier one, or, if the file
+    is a patch (see utils.content_overlay), only changes the fields it names. The resolved dict
+    returned by all() is cached and re-resolved per entry when single files are reloaded.
+    """
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+        self._entries = None
+        self._sources = None
+        self._field_sources = {}  # entry_id -> {field: plugin id}, for fields set by patches
+        self._plugin_entries = {}
+        self._plugin_files = {}
+        self._lock = threading.RLock()
+
+    @property
+    def is_loaded(self):
+        return self._entries is not None
+
+    def ensure_loaded(self):
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._load()
+        return self._entries
+
+    def _load(self):
+        registry = self.registry
+        cache = registry.cache
+        loader = cache.load_category if cache else load_category
+        plugins = list(registry.plugins.values())
+        with ThreadPoolExecutor(max_workers=registry.max_workers) as executor:
+            futures = [(plugin, executor.submit(self._load_plugin, loader, plugin)) for plugin in plugins]
+
+        entry_ids = {}
+        for plugin, future in futures:
+            try:
+                files, issues = future.result()
+            except (OSError, ValueError) as e:
+                registry.load_errors.append(PluginLoadError(f"Plugin '{plugin.id}' failed to load {self.name}: {e}"))
+                continue
+            registry.validation_errors.extend(issues)
+            plugin_entries = self._plugin_entries[plugin.id] = {}
+            self._plugin_files[plugin.id] = {}
+            for rel_path, (entry_id, data) in files.items():
+                self._plugin_files[plugin.id][rel_path] = entry_id
+                plugin_entries[entry_id] = data
+                entry_ids[entry_id] = None
+
+        entries, sources = {}, {}
+        for entry_id in entry_ids:
+            data, source, field_sources = self._resolve(entry_id)
+            if data is not None:
+                entries[entry_id] = data
+                sources[entry_id] = source
+                self._set_field_sources(entry_id, field_sources)
+        if cache:
+            cache.save(registry.plugins)
+        # Derived indexes are built before the entries are published to other threads
+        registry._on_category_loaded(self.name, entries)
+        self._sources = sources
+        self._entries = entries
+
+    def _load_plugin(self, loader, plugin):
+        """Parses and validates one plugin's files on a worker thread; unreadable and invalid files are dropped."""
+        issues = []
+        files = loader(plugin, self.name, issues)
+        if not self.registry.validate:
+            return files, issues
+        valid = {}
+        for rel_path, (entry_id, data) in files.items():
+            if is_patch(data):
+                # Patches are partial by design, the entry they produce is validated once resolved
+                valid[rel_path] = (entry_id, data)
+                continue
+            file_issues = validate(self.name, data, os.path.join(plugin.path, self.name, rel_path))
+            if file_issues:
+                issues.extend(file_issues)
+            else:
+                valid[rel_path] = (entry_id, data)
+        return valid, issues
+
+    def patch_file(self, plugin_id, rel_path, entry_id=None, data=None):
+        """Updates the entry of one file in place; entry_id=None means the file was removed.
+
+        Returns a list of (entry_id, change) pairs, where change is 'added', 'modified' or
+        'removed', describing how the merged view changed.
+        """
+        with self._lock:
+            if not self.is_loaded:
+                return []
+            files = self._plugin_files.setdefault(plugin_id, {})
+            plugin_entries = self._plugin_entries.setdefault(plugin_id, {})
+            affected = []
+            old_entry_id = files.pop(rel_path, None)
+            if old_entry_id is not None:
+                plugin_entries.pop(old_entry_id, None)
+                affected.append(old_entry_id)
+            if entry_id is not None:
+                files[rel_path] = entry_id
+                plugin_entries[entry_id] = data
+                if entry_id not in affected:
+                    affected.append(entry_id)
+            return [(affected_id, change) for affected_id in affected
+                    for change in [self._merge_entry(affected_id)] if change]
+
+    def _resolve(self, entry_id):
+        """Layers every plugin's version of an entry in load order.
+
+        Returns (data, source plugin id, field sources) as resolve_layers() does. A plugin's file
+        either replaces the entry or, if it is a patch, is merged over the layers below it. Entries
+        that come out of a patch are validated again, and patches are left off, topmost first,
+        until the result is valid.
+        """
+        layers = [(plugin_id, self._plugin_entries[plugin_id][entry_id]) for plugin_id in self.registry.plugins
+                  if entry_id in self._plugin_entries.get(plugin_id, {})]
+        if len(layers) == 1 and not is_patch(layers[0][1]):
+            return layers[0][1], layers[0][0], {}
+        resolved = resolve_layers(layers)
+        if resolved[0] is None or not self.registry.validate or not any(is_patch(layer) for _, layer in layers):
+            return resolved
+        while True:
+            issues = validate(self.name, resolved[0], f"{self.name}/{entry_id} as patched by {', '.join(p for p, _ in layers)}")
+            if not issues:
+                return resolved
+            self.registry.validation_errors.extend(issues)
+            # Drop the topmost patch and try again with the layers below it
+            top = max(i for i, (_, layer) in enumerate(layers) if is_patch(layer))
+            layers = layers[:top] + layers[top + 1:]
+            resolved = resolve_layers(layers)
+            if resolved[0] is None or not any(is_patch(layer) for _, layer in layers):
+                return resolved
+
+    def _merge_entry(self, entry_id):
+        """Re-resolves the layers of an entry and returns how the merged view changed."""
+        data, source, field_sources = self._resolve(entry_id)
+        existed = entry_id in self._entries
+        self._set_field_sources(entry_id, field_sources)
+        if data is None:
+            if not existed:
+                return None
+            del self._entries[entry_id]
+            del self._sources[entry_id]
+            return 'removed'
+        self._entries[entry_id] = data
+        self._sources[entry_id] = source
+        return 'modified' if existed else 'added'
+
+    def get(self, entry_id, default=None):
+        return self.ensure_loaded().get(entry_id, default)
+
+    def all(self):
+        return self.ensure_loaded()
+
+    def _set_field_sources(self, entry_id, field_sources):
+        if field_sources:
+            self._field_sources[entry_id] = field_sources
+        else:
+            self._field_sources.pop(entry_id, None)
+
+    def source(self, entry_id, field=None):
+        """Returns the id of the plugin that provided an entry, or the one that last patched field of it."""
+        self.ensure_loaded()
+        if field is not None:
+            plugin_id = self._field_sources.get(entry_id, {}).get(field)
+            if plugin_id is not None:
+                return plugin_id
+        return self._sources.get(entry_id)
+
+    def __contains__(self, entry_id):
+        return entry_id in self.ensure_loaded()
+
+    def __len__(self):
+        return len(self.ensure_loaded())
+
+
+class PluginRegistry:
+    """Process-wide, in-memory index of all plugin content.
+
+    Only manifests and the EAGER_CATEGORIES are read by load(); every other category is loaded
+    on first access, or ahead of time by prefetch().
+    """
+
+    EAGER_CATEGORIES = ("classes",)
+
+    def __init__(self, plugins_dir=PLUGINS_DIR, max_workers=None, cache=None, validate=True):
+        self.plugins_dir = plugins_dir
+        self.max_workers = max_workers
+        self.cache = cache
+        self.validate = validate
+        self.plugins = {}
+        self.load_errors = []
+        self.validation_errors = []
+        self.reference_errors = []
+        self._categories = {category: LazyCategory(self, category) for category in CATEGORIES}
+        self._classes_by_name = {}
+        self._progressions = None
+        self._progressions_lock = threading.Lock()
+        self._item_search = SearchIndex()
+        self._item_facets = FacetIndex()
+
+    def load(self):
+        """Discovers all plugins in dependency order and loads the eager categories.
+
+        If the registry has a PluginContentCache, unchanged plugins are served from it and the
+        cache is updated with anything that had to be re-parsed. Plugins that cannot be loaded
+        are skipped and their PluginLoadErrors are collected in `load_errors`. Content that fails
+        schema validation is left out and reported in `validation_errors`.
+        """
+        self.load_errors = []
+        self.validation_errors = []
+        self._progressions = None
+        for plugin in self.plugins.values():
+            if plugin.archive is not None:
+                plugin.archive.close()
+        plugins = discover_plugins(self.plugins_dir, self.load_errors)
+        if self.validate:
+            plugins = [plugin for plugin in plugins if self._validate_meta(plugin)]
+        ordered, errors = resolve_load_order(plugins)
+        self.load_errors.extend(errors)
+        self.plugins = {plugin.id: plugin for plugin in ordered}
+        self._categories = {category: LazyCategory(self, category) for category in CATEGORIES}
+        for category in self.EAGER_CATEGORIES:
+            self._categories[category].ensure_loaded()
+        return self
+
+    def _validate_meta(self, plugin):
+        issues = validate("meta", plugin.meta, os.path.join(plugin.path, "meta.json"))
+        if issues:
+            self.validation_errors.extend(issues)
+            self.load_errors.append(PluginLoadError(f"Plugin '{plugin.id}' has an invalid meta.json"))
+        return not issues
+
+    def prefetch(self, categories=CATEGORIES):
+        """Loads the given categories on a background thread and returns the started thread."""
+        pending = [self._categories[category] for category in categories if not self._categories[category].is_loaded]
+
+        def run():
+            for category in pending:
+                category.ensure_loaded()
+        thread = threading.Thread(target=run, name="plugin-prefetch", daemon=True)
+        thread.start()
+        return thread
+
+    def reload_path(self, path):
+        """Re-parses a single content file after it was created, changed or deleted on disk.
+
+        Only the affected entry is patched in the in-memory indexes. Returns a list of
+        (category, entry_id, change) tuples; categories that were never loaded are skipped.
+        """
+        full_path = os.path.abspath(path)
+        for plugin in self.plugins.values():
+            plugin_root = os.path.abspath(plugin.path)
+            if os.path.commonpath([plugin_root, full_path]) == plugin_root:
+                break
+        else:
+            return []
+        parts = os.path.relpath(full_path, plugin_root).split(os.sep, 1)
+        if len(parts) != 2 or parts[0] not in self._categories or not parts[1].endswith(".json"):
+            return []
+        category, rel_path = parts
+        lazy_category = self._categories[category]
+        if not lazy_category.is_loaded:
+            return []
+
+        entry_id = data = None
+        if os.path.isfile(full_path):
+            try:
+                entry_id, data = load_content_file(category, rel_path, full_path)
+            except (OSError, ValueError) as e:
+                # Keep the last good version while the author is mid-edit
+                self.load_errors.append(PluginLoadError(f"Plugin '{plugin.id}' failed to reload {rel_path}: {e}"))
+                return []
+            issues = validate(category, data, full_path) if self.validate and not is_patch(data) else []
+            if issues:
+                self.validation_errors.extend(issues)
+                return []
+        changes = lazy_category.patch_file(plugin.id, rel_path, entry_id, data)
+        for changed_id, change in changes:
+            self._on_entry_changed(category, changed_id, change)
+        return [(category, changed_id, change) for changed_id, change in changes]
+
+    def _on_category_loaded(self, category, entries):
+        """Rebuilds the derived indexes of a category once its content is available."""
+        if category in ("classes", "subclasses", "features"):
+            self._progressions = None
+        if category == "classes":
+            self._rebuild_classes_by_name(entries)
+        elif category == "items":
+            search_index = SearchIndex()
+            facet_index = FacetIndex()
+            for item_id, data in entries.items():
+                search_index.add(item_id, _item_search_fields(data))
+                facet_index.add(item_id, data)
+            self._item_search = search_index
+            self._item_facets = facet_index
+
+    def _on_entry_changed(self, category, entry_id, change):
+        """Keeps the derived indexes in step with a single patched entry."""
+        entries = self._categories[category].all()
+        if category in ("classes", "subclasses", "features"):
+            self._progressions = None
+        if category == "classes":
+            self._rebuild_classes_by_name(entries)
+        elif category == "items":
+            if change == "removed":
+                self._item_search.remove(entry_id)
+                self._item_facets.remove(entry_id)
+            else:
+                self._item_search.add(entry_id, _item_search_fields(entries[entry_id]))
+                self._item_facets.add(entry_id, entries[entry_id])
+
+    def _rebuild_classes_by_name(self, classes):
+        # Updated in place, views keep a reference to this dict
+        self._classes_by_name.clear()
+        self._classes_by_name.update({data.get("name", class_id): data for class_id, data in classes.items()})
+
+    # region Queries
+    def category(self, category):
+        """Returns the LazyCategory collection for a content category."""
+        return self._categories[category]
+
+    def get(self, category, entry_id, default=None):
+        return self._categories[category].get(entry_id, default)
+
+    def all(self, category):
+        """Returns {entry_id: data} for a content category. Treat the result as read-only."""
+        return self._categories[category].all()
+
+    def classes(self):
+        return self.all("classes")
+
+    def classes_by_name(self):
+        """Returns {display name: data} for every class, as shown in the class dropdown."""
+        self._categories["classes"].ensure_loaded()
+        return self._classes_by_name
+
+    def get_class(self, class_id):
+        return self.get("classes", class_id)
+
+    def class_progressions(self):
+        """Returns {class_id: ClassProgression} for every class and subclass.
+
+        Progressions are compiled once, when first asked for after the classes, subclasses or
+        features changed. Feature references that do not resolve are reported in
+        `reference_errors`.
+        """
+        progressions = self._progressions
+        if progressions is None:
+            with self._progressions_lock:
+                progressions = self._progressions
+                if progressions is None:
+                    progressions = self._progressions = self._compile_progressions()
+        return progressions
+
+    def _compile_progressions(self):
+        features = self.all("features")
+        progressions = {}
+        reference_errors = []
+        for category in ("classes", "subclasses"):
+            for class_id, data in self.all(category).items():
+                progression = progressions[class_id] = compile_progression(class_id, data, features)
+                for level, feature_id in progression.dangling:
+                    reference_errors.append(PluginLoadError(
+                        f"{category[:-2]} '{class_id}' references unknown feature '{feature_id}' at level {level}"))
+        self.reference_errors = reference_errors
+        return progressions
+
+    def class_progression(self, class_id):
+        """Returns the compiled ClassProgression of a class or subclass id, or None."""
+        return self.class_progressions().get(class_id)
+
+    def items(self):
+        return self.all("items")
+
+    def get_item(self, item_id):
+        return self.get("items", item_id)
+
+    def search_items(self, query, limit=None):
+        """Returns item ids matching a free-text query over name, type, properties and description.
+
+        Results are ranked best first and tolerate typos and partially typed words.
+        """
+        self._categories["items"].ensure_loaded()
+        return self._item_search.search(query, limit)
+
+    def query_items(self, filters=None, ranges=None, **facets):
+        """Returns the ids of items matching facet filters and numeric ranges.
+
+        e.g. query_items(type="weapon", category="martial", property="two-handed", slot="right_hand")
+        or query_items(ranges={"cost": (None, 50)}). See FacetIndex.query() for the semantics.
+        """
+        self._categories["items"].ensure_loaded()
+        return self._item_facets.query(dict(filters or {}, **facets), ranges)
+
+    def item_facet_values(self, facet):
+        """Returns {value: item count} for an item facet such as "slot" or "type"."""
+        self._categories["items"].ensure_loaded()
+        return self._item_facets.values(facet)
+
+    def item_fits_slot(self, item_id, slot_type):
+        """Returns True if a registered item can be equipped in the given slot."""
+        self._categories["items"].ensure_loaded()
+        return item_id in self._item_facets.ids("slot", slot_type)
+
+    def source_plugin(self, category, entry_id, field=None):
+        """Returns the Plugin that provided an entry (or, given a field, the value of that field), or None."""
+        return self.plugins.get(self._categories[category].source(entry_id, field))
+
+    def asset_path(self, category, entry_id, rel_path, field=None):
+        """Resolves a path inside the plugin that provided an entry, e.g. an item's "image".
+
+        field names the entry field rel_path came from; if a patch set that field, the path is
+        resolved in the patching plugin. Returns None for packed plugins, whose assets are only
+        available through read_asset().
+        """
+        plugin = self.source_plugin(category, entry_id, field)
+        if plugin is None or plugin.archive is not None:
+            return None
+        return os.path.join(plugin.path, rel_path)
+
+    def read_asset(self, category, entry_id, rel_path, field=None):
+        """Returns the bytes of a file inside the plugin that provided an entry (see asset_path()), or None."""
+        plugin = self.source_plugin(category, entry_id, field)
+        if plugin is None:
+            return None
+        if plugin.archive is not None:
+            name = rel_path.replace(os.sep, "/")
+            return plugin.archive.read(name) if name in plugin.archive else None
+        try:
+            with open(os.path.join(plugin.path, rel_path), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def asset_source(self, category, entry_id, rel_path, field=None):
+        """Returns something an <img src> can show: the file path, or a data: URI for packed plugins."""
+        path = self.asset_path(category, entry_id, rel_path, field)
+        if path is not None:
+            return path if os.path.exists(path) else None
+        data = self.read_asset(category, entry_id, rel_path, field)
+        if data is None:
+            return None
+        mime_type = mimetypes.guess_type(rel_path)[0] or "application/octet-stream"
+        return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+    # endregion
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Returns the shared PluginRegistry, loading all plugins on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from utils.plugin_cache import PluginContentCache
+                _registry = PluginRegistry(cache=PluginContentCache()).load()
+    return _registry
@@ -0,0 +1,283 @@
+import re
+
+from utils import dice_roller
+
+# region Schema Building Blocks
+# Schemas are plain Python structures: a type (str, int, float, bool, dict, list), a list with a
+# single element spec, a dict of key specs, or one of the helpers below. compile_schema() turns a
+# schema into nested checker closures once, so validating a file never re-interprets the schema.
+
+class Required:
+    """Marks a key of a dict spec as mandatory."""
+
+    def __init__(self, spec):
+        self.spec = spec
+
+
+class OneOf:
+    """Accepts a value matching any of the given specs."""
+
+    def __init__(self, *specs):
+        self.specs = specs
+
+
+class Enum:
+    """Accepts only the listed values."""
+
+    def __init__(self, *values):
+        self.values = frozenset(values)
+
+
+class Matches:
+    """Accepts strings matching a regular expression."""
+
+    def __init__(self, pattern, description):
+        self.pattern = re.compile(pattern)
+        self.description = description
+
+
+class Satisfies:
+    """Accepts values for which test(value) returns True."""
+
+    def __init__(self, test, description):
+        self.test = test
+        self.description = description
+
+
+class MapOf:
+    """An object with arbitrary keys matching key_pattern, all holding values of one spec."""
+
+    def __init__(self, key_pattern, value_spec, key_description):
+        self.key_pattern = re.compile(key_pattern)
+        self.value_spec = value_spec
+        self.key_description = key_description
+
+
+class AnyValue:
+    """Accepts anything."""
+# endregion
+
+
+class ValidationIssue:
+    """A single schema violation, located by file and JSON path."""
+    __slots__ = ('file', 'path', 'message')
+
+    def __init__(self, file, path, message):
+        self.file = file
+        self.path = path
+        self.message = message
+
+    def __str__(self):
+        return f"{self.file}: {self.path}: {self.message}"
+
+    def __repr__(self):
+        return f"ValidationIssue({str(self)!r})"
+
+
+def format_path(path):
+    """Renders a path tuple like ('features', '3', 0) as '$.features.3[0]'."""
+    text = "$"
+    for key in path:
+        text += f"[{key}]" if isinstance(key, int) else f".{key}"
+    return text
+
+
+_TYPE_NAMES = {str: "a string", int: "an integer", float: "a number", bool: "a boolean", dict: "an object", list: "an array"}
+
+
+def _type_checker(expected):
+    if expected is int:
+        test = lambda value: isinstance(value, int) and not isinstance(value, bool)
+    elif expected is float:
+        test = lambda value: isinstance(value, (int, float)) and not isinstance(value, bool)
+    else:
+        test = lambda value: isinstance(value, expected)
+    message = f"expected {_TYPE_NAMES[expected]}"
+
+    def check(value, path, errors):
+        if not test(value):
+            errors.append((path, f"{message}, got {type(value).__name__}"))
+    return check
+
+
+def compile_schema(spec):
+    """Compiles a schema spec into a check(value, path, errors) function.
+
+    Violations are appended to errors as (path_tuple, message) pairs.
+    """
+    if spec is AnyValue:
+        return lambda value, path, errors: None
+    if isinstance(spec, type):
+        return _type_checker(spec)
+    if isinstance(spec, list):
+        return _compile_list(spec[0])
+    if isinstance(spec, dict):
+        return _compile_object(spec)
+    if isinstance(spec, OneOf):
+        return _compile_one_of(spec)
+    if isinstance(spec, Enum):
+        allowed = spec.values
+        message = f"expected one of {', '.join(sorted(map(str, allowed)))}"
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append((path, f"{message}, got {value!r}"))
+        return check_enum
+    if isinstance(spec, Matches):
+        match, description = spec.pattern.match, spec.description
+
+        def check_matches(value, path, errors):
+            if not isinstance(value, str) or not match(value):
+                errors.append((path, f"expected {description}, got {value!r}"))
+        return check_matches
+    if isinstance(spec, Satisfies):
+        test, description = spec.test, spec.description
+
+        def check_satisfies(value, path, errors):
+            if not test(value):
+                errors.append((path, f"expected {description}, got {value!r}"))
+        return check_satisfies
+    if isinstance(spec, MapOf):
+        return _compile_map(spec)
+    raise TypeError(f"Unsupported schema spec: {spec!r}")
+
+
+def _compile_list(element_spec):
+    check_element = compile_schema(element_spec)
+
+    def check_list(value, path, errors):
+        if not isinstance(value, list):
+            errors.append((path, f"expected an array, got {type(value).__name__}"))
+            return
+        for i, element in enumerate(value):
+            check_element(element, path + (i,), errors)
+    return check_list
+
+
+def _compile_object(spec):
+    required = tuple(key for key, value in spec.items() if isinstance(value, Required))
+    checkers = tuple((key, compile_schema(value.spec if isinstance(value, Required) else value))
+                     for key, value in spec.items())
+
+    def check_object(value, path, errors):
+        if not isinstance(value, dict):
+            errors.append((path, f"expected an object, got {type(value).__name__}"))
+            return
+        for key in required:
+            if key not in value:
+                errors.append((path, f"missing required key '{key}'"))
+        for key, check in checkers:
+            if key in value:
+                check(value[key], path + (key,), errors)
+    return check_object
+
+
+def _compile_one_of(spec):
+    checkers = tuple(compile_schema(option) for option in spec.specs)
+
+    def check_one_of(value, path, errors):
+        attempts = []
+        for check in checkers:
+            option_errors = []
+            check(value, path, option_errors)
+            if not option_errors:
+                return
+            attempts.append(option_errors)
+        # Report the option that got furthest: one whose type matched, with the fewest complaints
+        errors.extend(min(attempts, key=lambda attempt: (any(p == path for p, _ in attempt), len(attempt))))
+    return check_one_of
+
+
+def _compile_map(spec):
+    key_match, key_description = spec.key_pattern.match, spec.key_description
+    check_value = compile_schema(spec.value_spec)
+
+    def check_map(value, path, errors):
+        if not isinstance(value, dict):
+            errors.append((path, f"expected an object, got {type(value).__name__}"))
+            return
+        for key, item in value.items():
+            if not key_match(key):
+                errors.append((path, f"key {key!r} is not {key_description}"))
+            check_value(item, path + (key,), errors)
+    return check_map
+
+
+# region Schemas
+ABILITIES = Enum("strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma")
+
+META_SCHEMA = {
+    "id": Matches(r'^[A-Za-z0-9_\-]+$', "a plugin id made of letters, digits, '_' and '-'"),
+    "name": Required(str),
+    "type": str,
+    "author": str,
+    "version": Required(str),
+    "engine_version": str,
+    "description": str,
+    "source_url": str,
+    "tags": [str],
+    "load_order": int,
+    "source_name": str,
+    "dependencies": [str],
+}
+
+CLASS_SCHEMA = {
+    "name": Required(str),
+    "hit_dice": Required(Matches(r'^d\d+$', "a hit die such as 'd10'")),
+    "proficiencies": {"armor": [str], "weapons": [str], "tools": [str]},
+    "saving_throws": [ABILITIES],
+    "skill_proficiency": {"choose": Required(int), "from": Required(OneOf([str], Enum("any")))},
+    "equipment_choices": [dict],
+    "features": MapOf(r'^\d+$', [OneOf(str, {"feature": Required(str)})], "a level number"),
+    "spellcasting": {"ability": Required(ABILITIES), "spell_list": str},
+}
+
+def _is_damage_string(value):
+    # Checked with the dice parser itself, so anything the roller accepts is valid here too
+    if not isinstance(value, str):
+        return False
+    expression, _ = dice_roller.split_damage_string(value)
+    try:
+        dice_roller.compile(expression)
+    except ValueError:
+        return False
+    return True
+
+
+ITEM_SCHEMA = {
+    "id": str,
+    "name": Required(str),
+    "type": Required(str),
+    "slot": OneOf(str, [str]),
+    "properties": [str],
+    "damage": Satisfies(_is_damage_string, "a damage string such as '1d8 piercing'"),
+    "category": str,
+    "base_ac": int,
+    "ac_bonus": int,
+    "strength_requirement": int,
+    "cost": OneOf(float, str),
+    "weight": float,
+    "description": str,
+    "image": str,
+}
+
+SCHEMAS = {
+    "meta": META_SCHEMA,
+    "classes": CLASS_SCHEMA,
+    "items": ITEM_SCHEMA,
+}
+# endregion
+
+_CHECKERS = {category: compile_schema(schema) for category, schema in SCHEMAS.items()}
+_CHECK_OBJECT = compile_schema(dict)
+
+
+def validate(category, data, file):
+    """Validates parsed JSON against the schema of its category ("meta", "classes", "items", ...).
+
+    Categories without a dedicated schema only need to hold a JSON object. Returns a list of
+    ValidationIssues, empty when the data is valid.
+    """
+    errors = []
+    _CHECKERS.get(category, _CHECK_OBJECT)(data, (), errors)
+    return [ValidationIssue(file, format_path(path), message) for path, message in errors]
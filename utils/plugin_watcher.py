@@ -0,0 +1,88 @@
+import os
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from utils.plugin_registry import CATEGORIES, get_registry
+
+
+class PluginWatcher(QObject):
+    """Watches plugin content folders and hot-reloads changed JSON files into the registry.
+
+    Only the touched files are re-parsed; views listen to `content_changed` and patch the
+    affected entry in place instead of reloading everything.
+    """
+    # category, entry_id, change ('added', 'modified' or 'removed')
+    content_changed = pyqtSignal(str, str, str)
+
+    DEBOUNCE_MS = 200
+
+    def __init__(self, registry, parent=None):
+        super().__init__(parent)
+        self.registry = registry
+        self._known_files = set()
+        self._pending = set()
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+
+        # Editors often write a file in several steps, so changes are batched
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(self.DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._flush)
+
+        self._watch_all()
+
+    def _watch_all(self):
+        directories, files = [], []
+        for plugin in self.registry.plugins.values():
+            for category in CATEGORIES:
+                for root, _, filenames in os.walk(os.path.join(plugin.path, category)):
+                    directories.append(root)
+                    files.extend(os.path.join(root, name) for name in filenames if name.endswith(".json"))
+        if directories:
+            self._watcher.addPaths(directories)
+        if files:
+            self._watcher.addPaths(files)
+        self._known_files.update(files)
+
+    def _on_file_changed(self, path):
+        self._pending.add(path)
+        self._debounce.start()
+
+    def _on_directory_changed(self, directory):
+        # New, deleted or renamed files only show up as a change of their folder
+        current = set()
+        for name in os.listdir(directory) if os.path.isdir(directory) else []:
+            path = os.path.join(directory, name)
+            if os.path.isdir(path) and path not in self._watcher.directories():
+                self._watcher.addPath(path)
+            elif name.endswith(".json"):
+                current.add(path)
+        known = {path for path in self._known_files if os.path.dirname(path) == directory}
+        self._pending.update(current ^ known)
+        self._debounce.start()
+
+    def _flush(self):
+        pending, self._pending = self._pending, set()
+        for path in sorted(pending):
+            if os.path.isfile(path):
+                self._known_files.add(path)
+                # Atomic saves replace the file, which drops it from the watch list
+                if path not in self._watcher.files():
+                    self._watcher.addPath(path)
+            else:
+                self._known_files.discard(path)
+            for category, entry_id, change in self.registry.reload_path(path):
+                self.content_changed.emit(category, entry_id, change)
+
+
+_watcher = None
+
+
+def get_plugin_watcher():
+    """Returns the shared PluginWatcher. A QApplication must exist before this is called."""
+    global _watcher
+    if _watcher is None:
+        _watcher = PluginWatcher(get_registry())
+    return _watcher
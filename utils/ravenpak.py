@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import argparse
+
+EXTENSION = ".ravenpak"
+MAGIC = b"RAVENPAK"
+FORMAT_VERSION = 1
+# magic, format version, length of the JSON index that follows the header
+_HEADER = struct.Struct("<8sIQ")
+
+
+class RavenPakError(Exception):
+    """Raised for files that are not valid .ravenpak archives."""
+
+
+class RavenPak:
+    """A packed plugin: one file holding a plugin folder's meta.json, content and images.
+
+    Layout: a fixed header, a JSON index of {name: [offset, length, entry_id]} and then the raw
+    file contents back to back. The archive is memory-mapped, so opening it only reads the
+    index; content and image blobs are sliced out of the mapping when they are asked for.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, index_length = _HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise RavenPakError(f"{path} is not a version {FORMAT_VERSION} .ravenpak archive")
+            index_end = _HEADER.size + index_length
+            index = json.loads(self._mmap[_HEADER.size:index_end])
+            self.meta = index["meta"]
+            self._files = index["files"]
+        except (OSError, ValueError, KeyError, TypeError, struct.error) as e:
+            self.close()
+            raise RavenPakError(f"{path} is not a valid .ravenpak archive: {e}") from e
+        except RavenPakError:
+            self.close()
+            raise
+        self._data_start = index_end
+        self._ids = {}  # (category, entry_id) -> name
+        for name, (_, _, entry_id) in self._files.items():
+            if entry_id is not None:
+                self._ids[(name.split("/", 1)[0], entry_id)] = name
+
+    def close(self):
+        if getattr(self, '_mmap', None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, name):
+        return name in self._files
+
+    def names(self, prefix=""):
+        """Returns the stored file names (e.g. "items/weapons/longbow.json") starting with prefix."""
+        return [name for name in self._files if name.startswith(prefix)]
+
+    def read(self, name):
+        """Returns the raw bytes of a stored file."""
+        offset, length, _ = self._files[name]
+        start = self._data_start + offset
+        return self._mmap[start:start + length]
+
+    def read_json(self, name):
+        return json.loads(self.read(name))
+
+    def entry_id(self, name):
+        return self._files[name][2]
+
+    def get_entry(self, category, entry_id):
+        """Decodes a single content entry by id, or returns None."""
+        name = self._ids.get((category, entry_id))
+        return None if name is None else self.read_json(name)
+
+
+def pack(source_dir, output_path=None):
+    """Packs a plugin folder (see plugins/plugin_structure_template.txt) into a .ravenpak file."""
+    from utils.plugin_registry import entry_id_for
+    meta_path = os.path.join(source_dir, "meta.json")
+    if not os.path.isfile(meta_path):
+        raise RavenPakError(f"{source_dir} has no meta.json")
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    if output_path is None:
+        output_path = os.path.normpath(source_dir) + EXTENSION
+
+    files, blobs, offset = {}, [], 0
+    for root, dirs, filenames in os.walk(source_dir):
+        dirs.sort()
+        for filename in sorted(filenames):
+            full_path = os.path.join(root, filename)
+            name = os.path.relpath(full_path, source_dir).replace(os.sep, "/")
+            if filename.startswith("."):
+                continue
+            with open(full_path, 'rb') as f:
+                blob = f.read()
+            entry_id = None
+            if name.endswith(".json") and "/" in name:
+                category, rel_path = name.split("/", 1)
+                entry_id = entry_id_for(category, rel_path.replace("/", os.sep), json.loads(blob))
+            files[name] = [offset, len(blob), entry_id]
+            blobs.append(blob)
+            offset += len(blob)
+
+    index = json.dumps({"meta": meta, "files": files}, separators=(",", ":")).encode("utf-8")
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(index)))
+        f.write(index)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def unpack(archive_path, output_dir):
+    """Extracts a .ravenpak archive back into a plugin folder."""
+    with RavenPak(archive_path) as archive:
+        os.makedirs(output_dir, exist_ok=True)
+        root = os.path.abspath(output_dir)
+        for name in archive.names():
+            target = os.path.abspath(os.path.join(output_dir, *name.split("/")))
+            if os.path.commonpath([root, target]) != root:
+                raise RavenPakError(f"Refusing to extract {name!r} outside of {output_dir}")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(archive.read(name))
+    return output_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.ravenpak",
+                                     description="Packs plugin folders into .ravenpak archives and back.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack_parser = commands.add_parser("pack", help="pack a plugin folder")
+    pack_parser.add_argument("source", help="plugin folder containing meta.json")
+    pack_parser.add_argument("-o", "--output", help=f"archive to write, defaults to <source>{EXTENSION}")
+    unpack_parser = commands.add_parser("unpack", help="extract an archive into a plugin folder")
+    unpack_parser.add_argument("archive")
+    unpack_parser.add_argument("output", help="folder to extract into")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "pack":
+            print(pack(args.source, args.output))
+        else:
+            print(unpack(args.archive, args.output))
+    except (OSError, ValueError, RavenPakError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
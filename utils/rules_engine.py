@@ -0,0 +1,40 @@
+from utils import character_stats
+from utils.character_stats import ABILITIES, SKILL_ABILITIES
+
+
+class RulesEngine:
+    """Computes the derived stats of Character models, without any UI.
+
+    class_data maps class display names to their JSON (see PluginRegistry.classes_by_name()).
+    compute() is a straight pass over character_stats.STAT_FORMULAS, meant for batch work such
+    as computing every sheet of a campaign; views that change one value at a time bind the same
+    formulas to a StatGraph through stat_inputs().
+    """
+
+    def __init__(self, class_data=None):
+        self.class_data = class_data if class_data is not None else {}
+
+    def class_info(self, character):
+        return self.class_data.get(character.class_name)
+
+    def stat_inputs(self, character):
+        """Returns the inputs of character_stats.build_character_graph() for a character."""
+        inputs = {"level": character.level}
+        for ability in ABILITIES:
+            inputs[character_stats.score(ability)] = character.ability_scores.get(ability, 10)
+            inputs[character_stats.save_proficient(ability)] = ability in character.save_proficiencies
+        for skill in SKILL_ABILITIES:
+            inputs[character_stats.skill_proficient(skill)] = skill in character.skill_proficiencies
+        class_info = self.class_info(character)
+        if class_info is not None:
+            inputs["hit_die"] = class_info.get("hit_dice", "d6")
+        return inputs
+
+    def compute(self, character):
+        """Returns {stat name: value} using the same names as the character stat graph."""
+        stats = {"level": character.level}
+        stats.update(character_stats.compute_stats(self.stat_inputs(character)))
+        return stats
+
+    def compute_many(self, characters):
+        return [self.compute(character) for character in characters]
@@ -0,0 +1,189 @@
+import re
+import heapq
+import bisect
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# How much a hit in each field counts towards the ranking
+DEFAULT_FIELD_WEIGHTS = {"name": 3.0, "type": 2.0, "properties": 1.5, "description": 1.0}
+# How much each kind of token match counts, relative to an exact match
+EXACT, PREFIX, INFIX, FUZZY = 1.0, 0.7, 0.5, 0.4
+# Shorter partial words match too much of the vocabulary to be worth expanding, except as the
+# first letter of a word in one of the SHORT_PREFIX_FIELDS
+MIN_PREFIX_LENGTH = 2
+SHORT_PREFIX_FIELDS = ("name",)
+# Words found inside longer ones, such as 'sword' in 'longsword', need at least one whole trigram
+MIN_INFIX_LENGTH = 3
+# Most vocabulary words checked by edit distance for one misspelt token, those sharing the most trigrams first
+FUZZY_CANDIDATE_LIMIT = 64
+
+
+def tokenize(text):
+    """Lowercases text and splits it into alphanumeric tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _trigrams(token):
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _within_distance(a, b, max_distance):
+    """Returns True if the Levenshtein distance between a and b is at most max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
+
+
+class SearchIndex:
+    """An inverted index over text fields with prefix and typo-tolerant matching.
+
+    Every token maps to the documents containing it (with the best field weight it appears
+    in), a sorted vocabulary answers prefix queries by bisection, and a trigram index over the
+    vocabulary finds candidates for infix and fuzzy matches. A single letter is matched against
+    the first letters of words in SHORT_PREFIX_FIELDS only. Documents must match every query
+    token; results are ranked by field weight and match quality.
+    """
+
+    def __init__(self, field_weights=None):
+        self.field_weights = field_weights or DEFAULT_FIELD_WEIGHTS
+        self._postings = {}     # token -> {doc_id: weight}
+        self._doc_tokens = {}   # doc_id -> set of tokens, used for removal
+        self._vocabulary = None  # sorted list of all tokens, rebuilt lazily after changes
+        self._trigrams = {}     # trigram -> set of tokens
+        self._initials = {}     # first letter of a word in SHORT_PREFIX_FIELDS -> {doc_id: weight}
+        self._doc_initials = {}  # doc_id -> set of letters, used for removal
+
+    def __len__(self):
+        return len(self._doc_tokens)
+
+    def add(self, doc_id, fields):
+        """Indexes a document given as {field: text}; re-adding a doc_id replaces it."""
+        if doc_id in self._doc_tokens:
+            self.remove(doc_id)
+        weights = {}
+        initials = {}
+        for field, text in fields.items():
+            weight = self.field_weights.get(field, 1.0)
+            for token in tokenize(text or ""):
+                if weights.get(token, 0) < weight:
+                    weights[token] = weight
+                if field in SHORT_PREFIX_FIELDS and initials.get(token[0], 0) < weight:
+                    initials[token[0]] = weight
+        for letter, weight in initials.items():
+            self._initials.setdefault(letter, {})[doc_id] = weight
+        self._doc_initials[doc_id] = set(initials)
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._vocabulary = None
+                for trigram in _trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(token)
+            postings[doc_id] = weight
+        self._doc_tokens[doc_id] = set(weights)
+
+    def remove(self, doc_id):
+        for letter in self._doc_initials.pop(doc_id, ()):
+            postings = self._initials[letter]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._initials[letter]
+        for token in self._doc_tokens.pop(doc_id, ()):
+            postings = self._postings[token]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary = None
+                for trigram in _trigrams(token):
+                    tokens = self._trigrams[trigram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigrams[trigram]
+
+    def _prefix_tokens(self, prefix):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + '\uffff', start)
+        return self._vocabulary[start:end]
+
+    def _infix_tokens(self, token):
+        """Returns the vocabulary words that contain token somewhere after their first letter."""
+        if len(token) < MIN_INFIX_LENGTH:
+            return []
+        # Every trigram inside the token also occurs in the words containing it
+        candidate_sets = sorted((self._trigrams.get(token[i:i + 3], set()) for i in range(len(token) - 2)), key=len)
+        candidates = set(candidate_sets[0]).intersection(*candidate_sets[1:])
+        return [candidate for candidate in candidates if token in candidate[1:]]
+
+    def _fuzzy_tokens(self, token):
+        if len(token) < 3:
+            return []
+        max_distance = 1 if len(token) <= 5 else 2
+        trigrams = _trigrams(token)
+        counts = {}
+        for trigram in trigrams:
+            for candidate in self._trigrams.get(trigram, ()):
+                counts[candidate] = counts.get(candidate, 0) + 1
+        # An edit touches at most three trigrams, so closer words must share at least this many
+        min_shared = max(len(trigrams) - 3 * max_distance, 1)
+        candidates = [(count, candidate) for candidate, count in counts.items()
+                      if count >= min_shared and candidate != token]
+        return [candidate for _, candidate in heapq.nlargest(FUZZY_CANDIDATE_LIMIT, candidates)
+                if _within_distance(token, candidate, max_distance)]
+
+    def _match_token(self, token, allow_prefix):
+        """Returns {doc_id: score} for every document matching one query token."""
+        scores = {}
+
+        def collect(candidate, quality):
+            for doc_id, weight in self._postings[candidate].items():
+                score = weight * quality
+                if scores.get(doc_id, 0) < score:
+                    scores[doc_id] = score
+
+        if token in self._postings:
+            collect(token, EXACT)
+        if allow_prefix and len(token) >= MIN_PREFIX_LENGTH:
+            for candidate in self._prefix_tokens(token):
+                if candidate != token:
+                    collect(candidate, PREFIX)
+        elif allow_prefix:
+            for doc_id, weight in self._initials.get(token, {}).items():
+                if scores.get(doc_id, 0) < weight * PREFIX:
+                    scores[doc_id] = weight * PREFIX
+        for candidate in self._infix_tokens(token):
+            collect(candidate, INFIX)
+        if not scores:
+            for candidate in self._fuzzy_tokens(token):
+                collect(candidate, FUZZY)
+        return scores
+
+    def search(self, query, limit=None):
+        """Returns doc ids matching every token of the query, best matches first.
+
+        The last query token is also matched as a prefix, since it is usually still being typed.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        per_token = [self._match_token(token, allow_prefix=(i == len(tokens) - 1))
+                     for i, token in enumerate(tokens)]
+        per_token.sort(key=len)
+        results = dict(per_token[0])
+        for scores in per_token[1:]:
+            results = {doc_id: score + scores[doc_id] for doc_id, score in results.items() if doc_id in scores}
+            if not results:
+                return []
+        if limit is not None:
+            return heapq.nlargest(limit, results, key=results.__getitem__)
+        return sorted(results, key=results.__getitem__, reverse=True)
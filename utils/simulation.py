@@ -0,0 +1,149 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.dice_roller import Distribution, compile as compile_dice, split_damage_string
+
+# Trials are split into fixed-size shards, each with its own child seed. The split does not
+# depend on the number of workers, so a given seed reproduces the same histogram on any machine.
+SHARD_SIZE = 1_000_000
+
+
+class Attack:
+    """One damage source per round: an attack roll against the target's AC, or automatic damage.
+
+    attack_bonus=None means the damage always lands (e.g. Magic Missile). advantage is None,
+    'advantage' or 'disadvantage'. Critical hits roll the damage dice twice but add flat
+    modifiers only once.
+    """
+    __slots__ = ('damage', 'attack_bonus', 'damage_bonus', 'advantage', 'crit_range', 'damage_type', 'name')
+
+    def __init__(self, damage, attack_bonus=None, damage_bonus=0, advantage=None, crit_range=20,
+                 damage_type=None, name=None):
+        if advantage not in (None, 'advantage', 'disadvantage'):
+            raise ValueError(f"Unknown advantage mode: {advantage!r}")
+        compile_dice(damage)  # Fail early on malformed damage strings
+        self.damage = damage
+        self.attack_bonus = attack_bonus
+        self.damage_bonus = damage_bonus
+        self.advantage = advantage
+        self.crit_range = crit_range
+        self.damage_type = damage_type
+        self.name = name or damage
+
+    @classmethod
+    def from_item(cls, item_data, attack_bonus, damage_bonus=0, advantage=None, crit_range=20):
+        """Builds an attack from an item's JSON data, e.g. a weapon with "damage": "1d8 piercing"."""
+        dice, damage_type = split_damage_string(item_data["damage"])
+        return cls(dice, attack_bonus, damage_bonus, advantage, crit_range, damage_type,
+                   item_data.get("name", item_data.get("id")))
+
+    def __repr__(self):
+        return f"Attack({self.name!r}, attack_bonus={self.attack_bonus}, damage_bonus={self.damage_bonus})"
+
+
+class SimulationResult:
+    """Merged outcome of a simulation: a histogram of total damage per round plus hit counts."""
+
+    def __init__(self, histogram, trials, hits, crits):
+        self.histogram = histogram
+        self.trials = trials
+        self.hits = hits
+        self.crits = crits
+
+    @property
+    def distribution(self):
+        """The empirical damage distribution, with mean, std, percentile() and friends."""
+        return Distribution(0, self.histogram / self.trials)
+
+    @property
+    def mean(self):
+        return self.distribution.mean
+
+    @property
+    def hit_rates(self):
+        return [hits / self.trials for hits in self.hits]
+
+    @property
+    def crit_rates(self):
+        return [crits / self.trials for crits in self.crits]
+
+    def merge(self, other):
+        """Combines the histograms and counters of two results."""
+        size = max(len(self.histogram), len(other.histogram))
+        histogram = np.zeros(size, dtype=np.int64)
+        histogram[:len(self.histogram)] += self.histogram
+        histogram[:len(other.histogram)] += other.histogram
+        hits = [a + b for a, b in zip(self.hits, other.hits)]
+        crits = [a + b for a, b in zip(self.crits, other.crits)]
+        return SimulationResult(histogram, self.trials + other.trials, hits, crits)
+
+    def __repr__(self):
+        return f"SimulationResult(trials={self.trials}, mean={self.mean:.3f})"
+
+
+def _roll_attack(attack, target_ac, n, rng):
+    """Rolls n rounds of a single attack and returns (damage, hit_mask, crit_mask)."""
+    compiled = compile_dice(attack.damage)
+    damage = compiled.roll_many(n, seed=rng)
+    if attack.attack_bonus is None:
+        return np.maximum(damage + attack.damage_bonus, 0), None, None
+
+    d20 = rng.integers(1, 21, size=(n, 1 if attack.advantage is None else 2))
+    if attack.advantage == 'advantage':
+        d20 = d20.max(axis=1)
+    elif attack.advantage == 'disadvantage':
+        d20 = d20.min(axis=1)
+    else:
+        d20 = d20[:, 0]
+
+    crit = d20 >= attack.crit_range
+    hit = crit | ((d20 != 1) & (d20 + attack.attack_bonus >= target_ac))
+    if crit.any():
+        # Critical hits add a second roll of the dice, without the flat modifiers
+        damage = damage + np.where(crit, compiled.roll_many(n, seed=rng) - compiled.flat_modifier, 0)
+    damage = np.where(hit, np.maximum(damage + attack.damage_bonus, 0), 0)
+    return damage, hit, crit
+
+
+def _run_shard(attacks, target_ac, trials, seed_sequence):
+    """Simulates one shard in a worker process and returns its SimulationResult."""
+    rng = np.random.default_rng(seed_sequence)
+    totals = np.zeros(trials, dtype=np.int64)
+    hits, crits = [], []
+    for attack in attacks:
+        damage, hit, crit = _roll_attack(attack, target_ac, trials, rng)
+        totals += damage
+        hits.append(trials if hit is None else int(hit.sum()))
+        crits.append(0 if crit is None else int(crit.sum()))
+    return SimulationResult(np.bincount(totals), trials, hits, crits)
+
+
+def simulate(attacks, target_ac=10, trials=1_000_000, seed=None, workers=None):
+    """Runs a Monte Carlo simulation of damage per round for a list of Attacks.
+
+    Trials are sharded across a ProcessPoolExecutor with independent seeded RNG streams and the
+    per-shard histograms are merged. The same seed always gives the same result, whatever
+    `workers` is. workers=1 runs everything in the current process.
+    """
+    if trials <= 0:
+        raise ValueError("trials must be positive")
+    attacks = list(attacks)
+    shard_sizes = [SHARD_SIZE] * (trials // SHARD_SIZE)
+    if trials % SHARD_SIZE:
+        shard_sizes.append(trials % SHARD_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+
+    workers = min(workers or os.cpu_count() or 1, len(shard_sizes))
+    if workers == 1:
+        results = [_run_shard(attacks, target_ac, size, s) for size, s in zip(shard_sizes, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run_shard, [attacks] * len(shard_sizes), [target_ac] * len(shard_sizes),
+                                        shard_sizes, seeds))
+
+    merged = results[0]
+    for result in results[1:]:
+        merged = merged.merge(result)
+    return merged
@@ -0,0 +1,173 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QBuffer, QByteArray, QIODevice
+from PyQt6.QtGui import QImageReader
+
+CACHE_DIR = 'resources/data/sprite_cache'
+# Longest side of the sprite stored in a character; anything the UI shows is smaller than this
+MASTER_SIZE = 512
+MASTER_JPEG_QUALITY = 90
+# Sizes the UI shows sprites at: the character sheet and the character library
+SHEET_SIZE = 150
+LIBRARY_SIZE = 48
+MEMORY_LIMIT = 8 * 1024 * 1024
+DISK_LIMIT = 64 * 1024 * 1024
+
+
+def _read_image(reader, max_size):
+    """Reads an image, letting the decoder downscale it to fit max_size; returns a null QImage on failure."""
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid() and (size.width() > max_size or size.height() > max_size):
+        # JPEG and others decode straight to the smaller size, without building the full image first
+        reader.setScaledSize(size.scaled(max_size, max_size, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if not image.isNull() and (image.width() > max_size or image.height() > max_size):
+        image = image.scaled(max_size, max_size, Qt.AspectRatioMode.KeepAspectRatio,
+                             Qt.TransformationMode.SmoothTransformation)
+    return image
+
+
+def _encode(image, image_format, quality=-1):
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, image_format, quality)
+    return bytes(buffer.data())
+
+
+def _reader_for(data):
+    """Returns (reader, buffer); the reader does not keep its buffer alive, so callers hold on to both."""
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    return QImageReader(buffer), buffer
+
+
+def import_sprite(path):
+    """Reads an image file into the bytes stored as a character's sprite.
+
+    Images within MASTER_SIZE are kept as they are; larger ones are decoded at a reduced size
+    and re-encoded, as PNG if they have transparency and as JPEG otherwise. Raises ValueError
+    for files that are not readable images. Safe to call off the UI thread.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    reader, _buffer = _reader_for(data)
+    size = reader.size()
+    image_format = bytes(reader.format()).decode().lower()
+    if size.isValid() and max(size.width(), size.height()) <= MASTER_SIZE and image_format in ("png", "jpeg", "jpg"):
+        return data
+    image = _read_image(reader, MASTER_SIZE)
+    if image.isNull():
+        raise ValueError(f"{path} is not a readable image: {reader.errorString()}")
+    if image.hasAlphaChannel():
+        return _encode(image, "PNG")
+    return _encode(image, "JPEG", MASTER_JPEG_QUALITY)
+
+
+class SpriteCache:
+    """PNG thumbnails of sprites, keyed by the sprite's content and the thumbnail size.
+
+    Thumbnails are kept in a least-recently-used cache in memory and in CACHE_DIR on disk,
+    each bounded to a number of bytes, so a sprite is decoded and scaled once per size rather
+    than on every load. Thread-safe.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, memory_limit=MEMORY_LIMIT, disk_limit=DISK_LIMIT):
+        self.cache_dir = cache_dir
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._memory = OrderedDict()  # (digest, size) -> PNG bytes, least recently used first
+        self._memory_bytes = 0
+        self._disk_bytes = None  # total size of CACHE_DIR, measured on first write
+        self._lock = threading.Lock()
+
+    def thumbnail(self, data, size):
+        """Returns PNG bytes of the sprite image data scaled to fit size, or None if it is not an image."""
+        key = (hashlib.sha1(data).hexdigest(), size)
+        with self._lock:
+            thumbnail = self._memory.get(key)
+            if thumbnail is not None:
+                self._memory.move_to_end(key)
+                return thumbnail
+
+        disk_path = os.path.join(self.cache_dir, f"{key[0]}_{size}.png")
+        try:
+            with open(disk_path, 'rb') as f:
+                thumbnail = f.read()
+            os.utime(disk_path)  # marks it as recently used for the disk eviction
+        except OSError:
+            reader, _buffer = _reader_for(data)
+            image = _read_image(reader, size)
+            if image.isNull():
+                return None
+            thumbnail = _encode(image, "PNG")
+            self._write_disk(disk_path, thumbnail)
+        self._remember(key, thumbnail)
+        return thumbnail
+
+    def _remember(self, key, thumbnail):
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = thumbnail
+            self._memory_bytes += len(thumbnail)
+            while self._memory_bytes > self.memory_limit and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _write_disk(self, disk_path, thumbnail):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = disk_path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(thumbnail)
+            os.replace(temp_path, disk_path)
+        except OSError:
+            # The disk cache is only an optimisation
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir))
+            else:
+                self._disk_bytes += len(thumbnail)
+            if self._disk_bytes > self.disk_limit:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """Removes the least recently used files until the disk cache is back to 3/4 of its limit."""
+        entries = sorted(os.scandir(self.cache_dir), key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in entries:
+            if self._disk_bytes <= self.disk_limit * 3 // 4:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self._disk_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._disk_bytes = None
+            if os.path.isdir(self.cache_dir):
+                for entry in os.scandir(self.cache_dir):
+                    os.remove(entry.path)
+
+
+_sprite_cache = None
+_sprite_cache_lock = threading.Lock()
+
+
+def get_sprite_cache():
+    """Returns the shared SpriteCache."""
+    global _sprite_cache
+    if _sprite_cache is None:
+        with _sprite_cache_lock:
+            if _sprite_cache is None:
+                _sprite_cache = SpriteCache()
+    return _sprite_cache
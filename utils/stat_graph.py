@@ -0,0 +1,146 @@
+import heapq
+from contextlib import contextmanager
+
+
+class StatNode:
+    """A value in a StatGraph: either an input, or derived from other nodes by a formula."""
+    __slots__ = ('name', 'value', 'formula', 'dependencies', 'dependents', 'order', 'watchers')
+
+    def __init__(self, name, value, formula, dependencies, order):
+        self.name = name
+        self.value = value
+        self.formula = formula
+        self.dependencies = dependencies
+        self.dependents = []
+        self.order = order
+        self.watchers = []
+
+
+class StatGraph:
+    """A small reactive dependency graph of typed stat values.
+
+    Inputs are set with set(); derived nodes are computed by formula(*dependency_values). Setting
+    an input recomputes only the nodes downstream of it, in dependency order, and stops early
+    wherever a recomputed value comes out unchanged. Watchers are called with the new value of
+    every node that actually changed, so views repaint only what is affected.
+
+    Inside a batch() block, set() only records inputs; they are applied in one pass when the
+    outermost block ends. `recalculations` and `passes` count formula evaluations and update
+    passes, to check how much work an operation caused.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self._batch_depth = 0
+        self._batched_inputs = {}
+        self.recalculations = 0
+        self.passes = 0
+
+    def add_input(self, name, value):
+        return self._add(name, value, None, ())
+
+    def add_derived(self, name, formula, dependencies):
+        """Adds a node computed as formula(*values of dependencies); the dependencies must already exist."""
+        dependencies = tuple(self._nodes[dependency] for dependency in dependencies)
+        value = formula(*(dependency.value for dependency in dependencies))
+        node = self._add(name, value, formula, dependencies)
+        for dependency in dependencies:
+            dependency.dependents.append(node)
+        return node
+
+    def _add(self, name, value, formula, dependencies):
+        if name in self._nodes:
+            raise ValueError(f"Stat '{name}' is already defined")
+        # Nodes can only depend on earlier nodes, so creation order is a topological order
+        node = self._nodes[name] = StatNode(name, value, formula, dependencies, len(self._nodes))
+        return node
+
+    def __contains__(self, name):
+        return name in self._nodes
+
+    def __getitem__(self, name):
+        return self._nodes[name].value
+
+    def get(self, name, default=None):
+        node = self._nodes.get(name)
+        return default if node is None else node.value
+
+    def values(self):
+        return {name: node.value for name, node in self._nodes.items()}
+
+    def watch(self, name, callback):
+        """Calls callback(new_value) whenever the value of a node changes."""
+        self._nodes[name].watchers.append(callback)
+
+    def set(self, name, value):
+        """Sets an input and recomputes what depends on it. Returns the names of changed nodes.
+
+        Inside a batch() nothing is recomputed yet and an empty list is returned.
+        """
+        return self.update({name: value})
+
+    @contextmanager
+    def batch(self):
+        """Defers every set() and update() in the block to a single pass at its end."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batched_inputs:
+                inputs, self._batched_inputs = self._batched_inputs, {}
+                self.update(inputs)
+
+    def update(self, inputs):
+        """Sets several inputs at once, recomputing each affected node only once."""
+        if self._batch_depth:
+            for name in inputs:
+                if self._nodes[name].formula is not None:
+                    raise ValueError(f"Stat '{name}' is derived and cannot be set")
+            self._batched_inputs.update(inputs)
+            return []
+        self.passes += 1
+        changed = []
+        pending = []
+        queued = set()
+        for name, value in inputs.items():
+            node = self._nodes[name]
+            if node.formula is not None:
+                raise ValueError(f"Stat '{name}' is derived and cannot be set")
+            if node.value == value:
+                continue
+            node.value = value
+            changed.append(node)
+            self._queue_dependents(node, pending, queued)
+
+        while pending:
+            _, node = heapq.heappop(pending)
+            self.recalculations += 1
+            value = node.formula(*(dependency.value for dependency in node.dependencies))
+            if value == node.value:
+                continue
+            node.value = value
+            changed.append(node)
+            self._queue_dependents(node, pending, queued)
+
+        for node in changed:
+            for callback in node.watchers:
+                callback(node.value)
+        return [node.name for node in changed]
+
+    @staticmethod
+    def _queue_dependents(node, pending, queued):
+        for dependent in node.dependents:
+            if dependent.order not in queued:
+                queued.add(dependent.order)
+                heapq.heappush(pending, (dependent.order, dependent))
+
+    def refresh(self):
+        """Recomputes every derived node and notifies all watchers, e.g. after binding a new view."""
+        self.passes += 1
+        for node in self._nodes.values():
+            if node.formula is not None:
+                self.recalculations += 1
+                node.value = node.formula(*(dependency.value for dependency in node.dependencies))
+            for callback in node.watchers:
+                callback(node.value)